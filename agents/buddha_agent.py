@@ -1,11 +1,21 @@
-import os
-from openai import OpenAI
-from typing import List, Dict, Any, Optional
-from data_classes.common_classes import Message, Language
-
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+import time
+import logging
+from functools import lru_cache
+import tiktoken
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+from data_classes.common_classes import Message, Language, ContextBatch, language_code
+from libs import semantic_cache
+from libs.open_ai import get_openai_client
+from agents.sumary_agent import generate_detailed_summary
+
+logger = logging.getLogger(__name__)
+
+# Prompt (system prompt plus history) above this many tokens is compacted before it is sent
+HISTORY_TOKEN_BUDGET = 4000
+# Number of most recent messages always sent verbatim
+KEEP_RECENT_MESSAGES = 6
 
 SYSTEM_PROMPT_VI = """
 Bạn là một vị tăng AI: từ bi, điềm tĩnh, và nói tiếng Việt, xưng hô như một vị tăng.
@@ -55,47 +65,161 @@ Tone:
 You are here to guide, not to judge.  
 """
 
-def generate_answer(messages: List[Message], contexts: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None, language: Language = Language.VI, model: str = "gpt-4o") -> str:
+# System prompt per language code
+_PROMPTS = {Language.VI.value: SYSTEM_PROMPT_VI, Language.EN.value: SYSTEM_PROMPT_EN}
+
+def build_chat_messages(messages: List[Message], language: Language = Language.VI) -> List[Dict[str, str]]:
+    """
+    Build the OpenAI chat payload for generate_answer.
+
+    Retrieved documents are not part of the prompt; the context system
+    message has been disabled since the original implementation. They
+    only scope the semantic cache.
+    """
+    chat_messages = [{"role": "system", "content": _PROMPTS.get(language_code(language), SYSTEM_PROMPT_EN)}]
+        
+    # Add the conversation history
+    for msg in messages:
+        chat_messages.append({"role": msg.role, "content": msg.content})
+    return chat_messages
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    # tiktoken downloads its tables on first use; remember a failure instead of retrying per request
     try:
-        # Prepare the context from relevant documents
-        context_text = "\n\n".join([
-            f"Source: {ctx['title']}\nContent: {ctx['content']}"
-            for ctx in contexts
-        ])
-        if language == Language.VI.value:
-            system_prompt = SYSTEM_PROMPT_VI
-            instruction = "Đây là nội dung liên quan đến câu hỏi của bạn"
-        else:
-            system_prompt = SYSTEM_PROMPT_EN
-            instruction = "Here is the relevant context from our knowledge base"
-        # Prepare the messages for the chat
-        chat_messages = [
-            {"role": "system", "content": system_prompt},
-            # {"role": "system", "content": f"{instruction}:\n\n{context_text}"}
-        ]
-            
-        # Add the conversation history
-        for msg in messages:
-            chat_messages.append({"role": msg.role, "content": msg.content})
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        logger.warning("tiktoken encoding unavailable for %s, estimating token counts", model)
+        return None
+
+def _count_text_tokens(text: str, model: str) -> int:
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+def count_tokens(messages: List[Message], model: str = "gpt-4o") -> int:
+    """
+    Count the tokens in the message contents.
+
+    Falls back to a four-characters-per-token estimate when the tokenizer
+    cannot be loaded.
+    """
+    return sum(_count_text_tokens(msg.content, model) for msg in messages)
+
+@lru_cache(maxsize=16)
+def system_prompt_tokens(language: str, model: str = "gpt-4o") -> int:
+    """Token count of the system prompt for a language code, encoded once per model."""
+    return _count_text_tokens(_PROMPTS.get(language, SYSTEM_PROMPT_EN), model)
+
+def _needs_compaction(messages: List[Message], language: Language, model: str) -> bool:
+    if len(messages) <= KEEP_RECENT_MESSAGES:
+        return False
+    budget = HISTORY_TOKEN_BUDGET - system_prompt_tokens(language_code(language), model)
+    return count_tokens(messages, model) > budget
+
+def _summary_message(summary: str) -> Message:
+    return Message(role="system", content=f"Summary of the earlier conversation:\n{summary}")
+
+def compact_history(messages: List[Message], language: Language = Language.VI, model: str = "gpt-4o") -> List[Message]:
+    """
+    Keep long conversations within HISTORY_TOKEN_BUDGET.
+
+    The budget covers the system prompt, whose token count is computed once,
+    plus the history. When it is exceeded, everything except the last
+    KEEP_RECENT_MESSAGES messages is replaced by one system message holding a
+    detailed summary of those turns. Summaries are cached by content, so a
+    session only pays for each summary once.
+    """
+    if not _needs_compaction(messages, language, model):
+        return messages
+    older, recent = messages[:-KEEP_RECENT_MESSAGES], messages[-KEEP_RECENT_MESSAGES:]
+    return [_summary_message(generate_detailed_summary(older, language)), *recent]
+
+def cached_chunk(answer: str, model: str) -> ChatCompletionChunk:
+    """Wrap a cached answer as a single completion chunk so stream consumers can read it unchanged."""
+    return ChatCompletionChunk(
+        id="semantic-cache",
+        object="chat.completion.chunk",
+        created=int(time.time()),
+        model=model,
+        choices=[Choice(index=0, delta=ChoiceDelta(role="assistant", content=answer), finish_reason="stop")]
+    )
+
+def _cache_stream(stream: Iterable[Any], vector: List[float], scope: str, query: str) -> Iterator[Any]:
+    """Pass stream chunks through and store the full answer once the stream is exhausted."""
+    parts = []
+    for chunk in stream:
+        content = chunk.choices[0].delta.content
+        if content:
+            parts.append(content)
+        yield chunk
+    semantic_cache.store(vector, scope, query, "".join(parts))
+
+def generate_answer(messages: List[Message], contexts: ContextBatch, options: Optional[Dict[str, Any]] = None, language: Language = Language.VI, model: str = "gpt-4o") -> str:
+    try:
+        is_streaming = bool(options and options.get("stream", False))
+
+        # Serve semantically identical questions from the response cache
+        scope = semantic_cache.scope_key(language, model, contexts.sources)
+        vector = semantic_cache.query_vector(messages)
+        if vector is not None:
+            cached = semantic_cache.lookup(vector, scope)
+            if cached is not None:
+                return iter([cached_chunk(cached, model)]) if is_streaming else cached
+
+        chat_messages = build_chat_messages(compact_history(messages, language, model), language)
+
+        # For non-streaming case, request the full response in one shot
+        if not is_streaming:
+            response = get_openai_client().chat.completions.create(
+                model=model,
+                messages=chat_messages,
+                temperature=0.7,
+                max_completion_tokens=1500
+            )
+            answer = response.choices[0].message.content or ""
+            if vector is not None:
+                semantic_cache.store(vector, scope, semantic_cache.query_text(messages), answer)
+            return answer
 
         # Generate the response with streaming
-        stream = client.chat.completions.create(
+        stream = get_openai_client().chat.completions.create(
             model=model, 
             messages=chat_messages,
             temperature=0.7,
             max_completion_tokens=1500,
             stream=True
         )
-
-        # For non-streaming case, collect the full response
-        if not options or not options.get("stream", False):
-            full_response = ""
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    full_response += chunk.choices[0].delta.content
-            return full_response
         
         # For streaming case, return the stream
+        if vector is not None:
+            return _cache_stream(stream, vector, scope, semantic_cache.query_text(messages))
         return stream
     except Exception as e:
         raise Exception(f"Error generating answer: {e}")
+
+def coalesce_stream(stream: Iterable[Any], max_tokens: int = 8, max_ms: int = 50) -> Iterator[str]:
+    """
+    Group streamed completion deltas into larger text pieces.
+
+    A piece is emitted once max_tokens deltas are buffered or max_ms has passed
+    since the last flush; whatever remains is flushed when the stream ends.
+    """
+    buffer: List[str] = []
+    last_flush = time.monotonic()
+    for chunk in stream:
+        content = chunk.choices[0].delta.content
+        if not content:
+            continue
+        buffer.append(content)
+        now = time.monotonic()
+        if len(buffer) >= max_tokens or (now - last_flush) * 1000 >= max_ms:
+            yield "".join(buffer)
+            buffer.clear()
+            last_flush = now
+    if buffer:
+        yield "".join(buffer)
@@ -1,22 +1,49 @@
 import os
 import json
-from typing import List, Dict, Any, Optional
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+import asyncio
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, AsyncIterator
 from langgraph.prebuilt import create_react_agent
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage
-from libs.weaviate_lib import client, search_documents, insert_to_collection, update_collection_object, delete_collection_object, COLLECTION_AGENTS
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk
+from libs.weaviate_lib import get_client, search_documents, insert_to_collection, update_collection_object, delete_collection_object, COLLECTION_AGENTS
 from data_classes.common_classes import Message, Language
 from datetime import datetime
 import uuid
 import weaviate.classes as wvc
+from weaviate.exceptions import UnexpectedStatusCodeError
+
+def _dumps(obj: Any) -> str:
+    """Serialize to a JSON string for Weaviate text properties, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+_loads = orjson.loads if orjson is not None else json.loads
 
 # Initialize OpenAI model
 model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
 
+@lru_cache(maxsize=32)
+def _get_chat_model(model_name: str, temperature: float) -> ChatOpenAI:
+    """Reuse one ChatOpenAI (and its HTTP client) per model configuration."""
+    return ChatOpenAI(model=model_name, temperature=temperature)
+
+@lru_cache(maxsize=128)
+def _get_prompt(system_prompt: str) -> ChatPromptTemplate:
+    """Compile the test prompt for a system prompt once; the user input is a template variable."""
+    return ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        ("human", "{input}")
+    ])
+
 # Tools for the meta agent
-@tool
 def create_agent(name: str, description: str, system_prompt: str, tools: List[str], model: str = "gpt-4o-mini", temperature: float = 0, author: str = "system") -> Dict[str, Any]:
     """
     Create a new AI agent with the specified configuration.
@@ -33,17 +60,21 @@ def create_agent(name: str, description: str, system_prompt: str, tools: List[st
     Returns:
         Dictionary containing the created agent's information
     """
+    return _create_agent(name, description, system_prompt, tools, model, temperature, author, str(uuid.uuid4()))
+
+def _create_agent(name: str, description: str, system_prompt: str, tools: List[str], model: str, temperature: float, author: str, agent_id: str) -> Dict[str, Any]:
+    """Store a new agent under agent_id; kept out of create_agent so the meta agent cannot pick the ID."""
     try:
-        agent_id = str(uuid.uuid4())
+        now = datetime.now()
         agent_config = {
             "name": name,
             "description": description,
             "system_prompt": system_prompt,
-            "tools": json.dumps(tools),
+            "tools": _dumps(tools),
             "model": model,
             "temperature": temperature,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
+            "created_at": now,
+            "updated_at": now,
             "author": author,
             "status": "active"
         }
@@ -61,7 +92,11 @@ def create_agent(name: str, description: str, system_prompt: str, tools: List[st
     except Exception as e:
         return {"error": f"Failed to create agent: {str(e)}"}
 
-@tool
+@lru_cache(maxsize=64)
+def _author_filter(author: str):
+    """Build the author filter once per author; filters are immutable once built."""
+    return wvc.query.Filter.by_property("author").equal(author)
+
 def list_agents(author: str = "system", limit: int = 10) -> List[Dict[str, Any]]:
     """
     List all agents created by a specific author.
@@ -74,10 +109,10 @@ def list_agents(author: str = "system", limit: int = 10) -> List[Dict[str, Any]]
         List of agent configurations
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_client().collections.get(COLLECTION_AGENTS)
         response = collection.query.fetch_objects(
             limit=limit,
-            filters=wvc.query.Filter.by_property("author").equal(author)
+            filters=_author_filter(author)
         )
         
         agents = []
@@ -90,7 +125,6 @@ def list_agents(author: str = "system", limit: int = 10) -> List[Dict[str, Any]]
     except Exception as e:
         return [{"error": f"Failed to list agents: {str(e)}"}]
 
-@tool
 def get_agent(agent_id: str) -> Dict[str, Any]:
     """
     Get a specific agent's configuration by ID.
@@ -102,7 +136,7 @@ def get_agent(agent_id: str) -> Dict[str, Any]:
         Agent configuration
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_client().collections.get(COLLECTION_AGENTS)
         response = collection.query.fetch_object_by_id(agent_id)
         
         if response:
@@ -114,7 +148,35 @@ def get_agent(agent_id: str) -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Failed to get agent: {str(e)}"}
 
-@tool
+def get_agents(agent_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Get several agents' configurations in a single query.
+    
+    Args:
+        agent_ids: The UUIDs of the agents
+    
+    Returns:
+        List of agent configurations; ids that do not exist are omitted
+    """
+    if not agent_ids:
+        return []
+    try:
+        collection = get_client().collections.get(COLLECTION_AGENTS)
+        response = collection.query.fetch_objects(
+            limit=len(agent_ids),
+            filters=wvc.query.Filter.by_id().contains_any(agent_ids)
+        )
+        
+        agents = []
+        for obj in response.objects:
+            agent_data = obj.properties
+            agent_data["uuid"] = obj.uuid
+            agents.append(agent_data)
+        
+        return agents
+    except Exception as e:
+        return [{"error": f"Failed to get agents: {str(e)}"}]
+
 def update_agent(agent_id: str, **kwargs) -> Dict[str, Any]:
     """
     Update an existing agent's configuration.
@@ -127,18 +189,13 @@ def update_agent(agent_id: str, **kwargs) -> Dict[str, Any]:
         Updated agent configuration
     """
     try:
-        # Get current agent
-        current_agent = get_agent(agent_id)
-        if "error" in current_agent:
-            return current_agent
-        
         # Update fields
         update_data = {}
         for key, value in kwargs.items():
             if key in ["name", "description", "system_prompt", "model", "temperature"]:
                 update_data[key] = value
             elif key == "tools":
-                update_data[key] = json.dumps(value) if isinstance(value, list) else value
+                update_data[key] = _dumps(value) if isinstance(value, list) else value
         
         update_data["updated_at"] = datetime.now()
         
@@ -149,10 +206,14 @@ def update_agent(agent_id: str, **kwargs) -> Dict[str, Any]:
             return {"message": f"Agent '{agent_id}' updated successfully", "updated_fields": list(update_data.keys())}
         else:
             return {"error": "Failed to update agent"}
+    except UnexpectedStatusCodeError as e:
+        # The partial update is a single round-trip; a missing agent surfaces as 404
+        if e.status_code == 404:
+            return {"error": "Agent not found"}
+        return {"error": f"Failed to update agent: {str(e)}"}
     except Exception as e:
         return {"error": f"Failed to update agent: {str(e)}"}
 
-@tool
 def delete_agent(agent_id: str) -> Dict[str, Any]:
     """
     Delete an agent by ID.
@@ -173,7 +234,6 @@ def delete_agent(agent_id: str) -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Failed to delete agent: {str(e)}"}
 
-@tool
 def search_agents(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     """
     Search for agents using semantic search.
@@ -186,7 +246,7 @@ def search_agents(query: str, limit: int = 5) -> List[Dict[str, Any]]:
         List of matching agents
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_client().collections.get(COLLECTION_AGENTS)
         response = collection.query.near_text(
             query=query,
             limit=limit,
@@ -203,7 +263,6 @@ def search_agents(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     except Exception as e:
         return [{"error": f"Failed to search agents: {str(e)}"}]
 
-@tool
 def generate_agent_code(agent_config: Dict[str, Any]) -> str:
     """
     Generate Python code for an agent based on its configuration.
@@ -220,7 +279,7 @@ def generate_agent_code(agent_config: Dict[str, Any]) -> str:
         model = agent_config.get("model", "gpt-4o-mini")
         temperature = agent_config.get("temperature", 0)
         tools_json = agent_config.get("tools", "[]")
-        tools = json.loads(tools_json) if isinstance(tools_json, str) else tools_json
+        tools = _loads(tools_json) if isinstance(tools_json, str) else tools_json
         
         # Generate the code
         code = f'''import os
@@ -285,7 +344,6 @@ if __name__ == "__main__":
     except Exception as e:
         return f"Error generating code: {str(e)}"
 
-@tool
 def test_agent(agent_id: str, test_input: str) -> Dict[str, Any]:
     """
     Test an agent with a sample input.
@@ -308,17 +366,9 @@ def test_agent(agent_id: str, test_input: str) -> Dict[str, Any]:
         model_name = agent_config.get("model", "gpt-4o-mini")
         temperature = agent_config.get("temperature", 0)
         
-        test_model = ChatOpenAI(model=model_name, temperature=temperature)
-        
-        # Create prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            ("human", test_input)
-        ])
-        
         # Generate response
-        chain = prompt | test_model
-        response = chain.invoke({})
+        chain = _get_prompt(system_prompt) | _get_chat_model(model_name, temperature)
+        response = chain.invoke({"input": test_input})
         
         return {
             "agent_name": agent_config.get("name", "Unknown"),
@@ -330,16 +380,32 @@ def test_agent(agent_id: str, test_input: str) -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Failed to test agent: {str(e)}"}
 
+def _async_tool(func) -> StructuredTool:
+    """
+    Expose a blocking helper as a tool with a native coroutine.
+
+    The coroutine runs the helper in a worker thread, so when the agent emits
+    several tool calls in one turn their Weaviate and LLM round-trips overlap
+    instead of running back to back.
+    """
+    async def coroutine(**kwargs):
+        return await asyncio.to_thread(func, **kwargs)
+    return StructuredTool.from_function(func=func, coroutine=coroutine)
+
 # Meta agent tools
 meta_agent_tools = [
-    create_agent,
-    list_agents,
-    get_agent,
-    update_agent,
-    delete_agent,
-    search_agents,
-    generate_agent_code,
-    test_agent
+    _async_tool(func)
+    for func in (
+        create_agent,
+        list_agents,
+        get_agent,
+        get_agents,
+        update_agent,
+        delete_agent,
+        search_agents,
+        generate_agent_code,
+        test_agent
+    )
 ]
 
 # Meta agent prompt
@@ -374,7 +440,35 @@ meta_agent = create_react_agent(
     prompt=meta_agent_prompt,
 )
 
-def generate_meta_agent_response(messages: List[Message], contexts: List[Dict[str, str]] = None, options: Optional[Dict[str, Any]] = None, language: Language = Language.EN) -> str:
+GREETING = "Hello! I'm your AI Agent Builder. How can I help you create or manage AI agents today?"
+
+def build_meta_agent_input(messages: List[Message], contexts: List[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Build the meta agent input from the conversation, excluding an empty conversation."""
+    # Get the latest user message
+    latest_message = messages[-1].content
+    
+    # Add context if available
+    if contexts:
+        context_text = "\n\n".join([
+            f"Context: {ctx['content']}"
+            for ctx in contexts
+        ])
+        latest_message = f"{latest_message}\n\nRelevant context:\n{context_text}"
+    
+    # Prepare chat history
+    chat_history = []
+    for msg in messages[:-1]:  # Exclude the latest message
+        if msg.role == "user":
+            chat_history.append(HumanMessage(content=msg.content))
+        elif msg.role == "assistant":
+            chat_history.append(AIMessage(content=msg.content))
+    
+    return {
+        "input": latest_message,
+        "chat_history": chat_history
+    }
+
+async def agenerate_meta_agent_response(messages: List[Message], contexts: List[Dict[str, str]] = None, options: Optional[Dict[str, Any]] = None, language: Language = Language.EN) -> str:
     """
     Generate a response using the meta agent.
     
@@ -390,32 +484,47 @@ def generate_meta_agent_response(messages: List[Message], contexts: List[Dict[st
     try:
         # Prepare the input
         if not messages:
-            return "Hello! I'm your AI Agent Builder. How can I help you create or manage AI agents today?"
+            return GREETING
         
-        # Get the latest user message
-        latest_message = messages[-1].content
+        # Invoke the meta agent; tool calls from one turn run concurrently
+        response = await meta_agent.ainvoke(build_meta_agent_input(messages, contexts))
         
-        # Add context if available
-        if contexts:
-            context_text = "\n\n".join([
-                f"Context: {ctx['content']}"
-                for ctx in contexts
-            ])
-            latest_message = f"{latest_message}\n\nRelevant context:\n{context_text}"
+        return response["output"]
         
-        # Prepare chat history
-        chat_history = []
-        for msg in messages[:-1]:  # Exclude the latest message
-            if msg.role == "user":
-                chat_history.append(HumanMessage(content=msg.content))
-            elif msg.role == "assistant":
-                chat_history.append(AIMessage(content=msg.content))
+    except Exception as e:
+        return f"Error generating response: {str(e)}"
+
+async def astream_meta_agent_response(messages: List[Message], contexts: List[Dict[str, str]] = None, options: Optional[Dict[str, Any]] = None, language: Language = Language.EN) -> AsyncIterator[str]:
+    """
+    Stream the meta agent's reply text as the model produces it.
+    
+    Yields the content of the model's message chunks; tool calls still run
+    between chunks but their output is not yielded.
+    """
+    if not messages:
+        yield GREETING
+        return
+    try:
+        async for chunk, _ in meta_agent.astream(build_meta_agent_input(messages, contexts), stream_mode="messages"):
+            if isinstance(chunk, AIMessageChunk) and isinstance(chunk.content, str) and chunk.content:
+                yield chunk.content
+    except Exception as e:
+        yield f"Error generating response: {str(e)}"
+
+def generate_meta_agent_response(messages: List[Message], contexts: List[Dict[str, str]] = None, options: Optional[Dict[str, Any]] = None, language: Language = Language.EN) -> str:
+    """
+    Generate a response using the meta agent, blocking the calling thread.
+    
+    Used by the Flask routes. The agent is invoked synchronously rather than
+    through asyncio.run: the shared ChatOpenAI keeps its async HTTP client
+    bound to the first event loop, so a fresh loop per request would fail
+    on every other call.
+    """
+    try:
+        if not messages:
+            return GREETING
         
-        # Invoke the meta agent
-        response = meta_agent.invoke({
-            "input": latest_message,
-            "chat_history": chat_history
-        })
+        response = meta_agent.invoke(build_meta_agent_input(messages, contexts))
         
         return response["output"]
         
@@ -423,7 +532,7 @@ def generate_meta_agent_response(messages: List[Message], contexts: List[Dict[st
         return f"Error generating response: {str(e)}"
 
 # Convenience function for direct agent creation
-def create_simple_agent(name: str, description: str, system_prompt: str, author: str = "system") -> Dict[str, Any]:
+def create_simple_agent(name: str, description: str, system_prompt: str, author: str = "system", agent_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Create a simple agent with basic configuration.
     
@@ -432,14 +541,18 @@ def create_simple_agent(name: str, description: str, system_prompt: str, author:
         description: Description of the agent
         system_prompt: System prompt for the agent
         author: Author of the agent
+        agent_id: UUID to store the agent under (default: a new random UUID)
     
     Returns:
         Created agent information
     """
-    return create_agent(
+    return _create_agent(
         name=name,
         description=description,
         system_prompt=system_prompt,
         tools=[],
-        author=author
+        model="gpt-4o-mini",
+        temperature=0,
+        author=author,
+        agent_id=agent_id or str(uuid.uuid4())
     )
@@ -1,11 +1,22 @@
-import os
-from openai import OpenAI
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, UTC
+from threading import Lock
 from typing import List, Dict, Any, Optional
-from data_classes.common_classes import Message, Language
+from weaviate.collections.classes.filters import Filter
+from data_classes.common_classes import Message, Language, language_code
+from libs.open_ai import get_openai_client
+from libs.weaviate_lib import COLLECTION_SUMMARIES, insert_to_collection, search_non_vector_collection
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODEL = "gpt-3.5-turbo"
+# In-process layer in front of the Summaries collection
+SUMMARY_MEMO_SIZE = 1024
+_summary_memo: "OrderedDict[str, str]" = OrderedDict()
+# Request threads share the memo; OrderedDict reordering is not thread-safe
+_summary_memo_lock = Lock()
 
 # System prompts for different languages
 SYSTEM_PROMPT_VI = """Bạn là một trợ lý AI chuyên nghiệp trong việc tóm tắt nội dung cuộc trò chuyện.
@@ -30,6 +41,106 @@ The title should:
 
 Return only the title, no additional explanation."""
 
+DETAILED_SYSTEM_PROMPT_VI = """Bạn là một trợ lý AI chuyên nghiệp trong việc tóm tắt cuộc trò chuyện.
+Hãy tạo một bản tóm tắt chi tiết về cuộc trò chuyện, bao gồm:
+1. Các điểm chính được thảo luận
+2. Kết luận hoặc giải pháp (nếu có)
+3. Các câu hỏi quan trọng và câu trả lời
+
+Tóm tắt nên ngắn gọn nhưng đầy đủ thông tin."""
+
+DETAILED_SYSTEM_PROMPT_EN = """You are a professional AI assistant specialized in summarizing conversations.
+Create a detailed summary of the conversation, including:
+1. Main points discussed
+2. Conclusions or solutions (if any)
+3. Important questions and answers
+
+The summary should be concise but informative."""
+
+# Prompts keyed by language code
+_TITLE_PROMPTS = {Language.VI.value: SYSTEM_PROMPT_VI, Language.EN.value: SYSTEM_PROMPT_EN}
+_DETAILED_PROMPTS = {Language.VI.value: DETAILED_SYSTEM_PROMPT_VI, Language.EN.value: DETAILED_SYSTEM_PROMPT_EN}
+
+def build_summary_messages(messages: List[Message], language: Language = Language.VI) -> List[Dict[str, str]]:
+    """Build the chat payload used to generate a conversation title."""
+    # Prepare the conversation context
+    conversation = "Here is the conversation:\n" + "\n".join([f"{msg.role}: {msg.content}" for msg in messages])
+    
+    # Prepare the system prompt
+    system_prompt = _TITLE_PROMPTS.get(language_code(language), SYSTEM_PROMPT_EN)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": conversation}
+    ]
+
+def build_detailed_summary_messages(messages: List[Message], language: Language = Language.VI) -> List[Dict[str, str]]:
+    """Build the chat payload used to generate a detailed conversation summary."""
+    # Prepare the conversation context
+    conversation = "\n".join([f"{msg.role}: {msg.content}" for msg in messages])
+    
+    # System prompt for detailed summary
+    system_prompt = _DETAILED_PROMPTS.get(language_code(language), DETAILED_SYSTEM_PROMPT_EN)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": conversation}
+    ]
+
+def summary_cache_key(kind: str, chat_messages: List[Dict[str, str]]) -> str:
+    """
+    Key a summary by its kind, model and exact prompt.
+
+    The prompt includes the language-specific system prompt and the full
+    conversation, so identical conversations share one summary across sessions.
+    """
+    raw = "\x1f".join([kind, SUMMARY_MODEL, *(msg["content"] for msg in chat_messages)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+def load_cached_summary(key: str) -> Optional[str]:
+    """Return a previously generated summary from memory or the Summaries collection."""
+    with _summary_memo_lock:
+        summary = _summary_memo.get(key)
+        if summary is not None:
+            _summary_memo.move_to_end(key)
+            return summary
+    try:
+        stored = search_non_vector_collection(
+            collection_name=COLLECTION_SUMMARIES,
+            filters=Filter.by_property("key").equal(key),
+            limit=1,
+            properties=["summary"]
+        )
+    except Exception:
+        logger.exception("Summary cache lookup failed")
+        return None
+    if not stored:
+        return None
+    summary = stored[0]["summary"]
+    _remember_summary(key, summary)
+    return summary
+
+def store_cached_summary(key: str, kind: str, summary: str) -> None:
+    """Persist a generated summary so other sessions and processes can reuse it."""
+    _remember_summary(key, summary)
+    try:
+        insert_to_collection(
+            collection_name=COLLECTION_SUMMARIES,
+            properties={
+                "key": key,
+                "kind": kind,
+                "summary": summary,
+                "created_at": datetime.now(UTC)
+            }
+        )
+    except Exception:
+        logger.exception("Summary cache store failed")
+
+def _remember_summary(key: str, summary: str) -> None:
+    with _summary_memo_lock:
+        _summary_memo[key] = summary
+        _summary_memo.move_to_end(key)
+        if len(_summary_memo) > SUMMARY_MEMO_SIZE:
+            _summary_memo.popitem(last=False)
+
 def generate_summary(messages: List[Message], language: Language = Language.VI) -> str:
     """
     Generate a summary title from the first message of a conversation
@@ -45,22 +156,16 @@ def generate_summary(messages: List[Message], language: Language = Language.VI)
         Exception: If there's an error generating the summary
     """
     try:
-        # Prepare the conversation context
-        conversation = "Here is the conversation:\n" + "\n".join([f"{msg.role}: {msg.content}" for msg in messages])
-        
-        # Prepare the system prompt
-        if language == Language.VI.value:
-            system_prompt = SYSTEM_PROMPT_VI
-        else:
-            system_prompt = SYSTEM_PROMPT_EN
-        
+        chat_messages = build_summary_messages(messages, language)
+        key = summary_cache_key("title", chat_messages)
+        summary = load_cached_summary(key)
+        if summary is not None:
+            return summary
+
         # Generate summary using OpenAI
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": conversation}
-            ],
+        response = get_openai_client().chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=chat_messages,
             temperature=0.7,
             max_tokens=50
         )
@@ -71,6 +176,7 @@ def generate_summary(messages: List[Message], language: Language = Language.VI)
         # Remove any trailing punctuation
         summary = summary.rstrip('.,!?')
         
+        store_cached_summary(key, "title", summary)
         return summary
         
     except Exception as e:
@@ -91,39 +197,23 @@ def generate_detailed_summary(messages: List[Message], language: Language = Lang
         Exception: If there's an error generating the summary
     """
     try:
-        # Prepare the conversation context
-        conversation = "\n".join([f"{msg.role}: {msg.content}" for msg in messages])
-        
-        # System prompt for detailed summary
-        if language == Language.VI:
-            system_prompt = """Bạn là một trợ lý AI chuyên nghiệp trong việc tóm tắt cuộc trò chuyện.
-            Hãy tạo một bản tóm tắt chi tiết về cuộc trò chuyện, bao gồm:
-            1. Các điểm chính được thảo luận
-            2. Kết luận hoặc giải pháp (nếu có)
-            3. Các câu hỏi quan trọng và câu trả lời
-            
-            Tóm tắt nên ngắn gọn nhưng đầy đủ thông tin."""
-        else:
-            system_prompt = """You are a professional AI assistant specialized in summarizing conversations.
-            Create a detailed summary of the conversation, including:
-            1. Main points discussed
-            2. Conclusions or solutions (if any)
-            3. Important questions and answers
-            
-            The summary should be concise but informative."""
-        
+        chat_messages = build_detailed_summary_messages(messages, language)
+        key = summary_cache_key("detailed", chat_messages)
+        summary = load_cached_summary(key)
+        if summary is not None:
+            return summary
+
         # Generate detailed summary using OpenAI
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": conversation}
-            ],
+        response = get_openai_client().chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=chat_messages,
             temperature=0.7,
             max_tokens=500
         )
         
-        return response.choices[0].message.content.strip()
+        summary = response.choices[0].message.content.strip()
+        store_cached_summary(key, "detailed", summary)
+        return summary
         
     except Exception as e:
         raise Exception(f"Error generating detailed summary: {str(e)}")
@@ -1,9 +1,10 @@
-from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+import hashlib
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Set
 from datetime import datetime
 from enum import Enum
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     role: str
     content: str
@@ -15,7 +16,11 @@ class Language(Enum):
     VI = "vi"
     EN = "en"
 
-@dataclass
+def language_code(language) -> str:
+    """Normalize a Language member or its raw string value to the language code."""
+    return language.value if isinstance(language, Language) else language
+
+@dataclass(slots=True)
 class AskRequest:
     messages: List[Message]
     session_id: str
@@ -23,13 +28,42 @@ class AskRequest:
     language: Language = Language.VI
     options: Optional[Dict[str, Any]] = None
 
-@dataclass
+@dataclass(slots=True)
+class ContextBatch:
+    """Retrieved documents stored column-wise: parallel lists indexed by rank."""
+    titles: List[str] = field(default_factory=list)
+    contents: List[str] = field(default_factory=list)
+    descriptions: List[Optional[str]] = field(default_factory=list)
+    # Distinct source titles, collected in the same pass that fills the lists
+    sources: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_documents(cls, documents: List[Dict[str, Any]]) -> "ContextBatch":
+        """Build a batch in rank order, keeping only the first document for each distinct content."""
+        batch = cls()
+        seen = set()
+        for doc in documents:
+            digest = hashlib.blake2b(doc["content"].encode("utf-8"), digest_size=8).digest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            title = doc["title"]
+            batch.titles.append(title)
+            batch.sources.add(title)
+            batch.contents.append(doc["content"])
+            batch.descriptions.append(doc.get("description"))
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+@dataclass(slots=True)
 class Pagination:
     limit: int = 3
     offset: Optional[int] = None
     page: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class Section:
     uuid: Optional[str] = None
     language: Language = Language.VI
@@ -40,18 +74,18 @@ class Section:
     updated_at: Optional[str] = None
     author: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class SignInRequest:
     email: str
     password: str
 
-@dataclass
+@dataclass(slots=True)
 class SignUpRequest:
     email: str
     password: str
     name: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class User:
     email: str
     password: str  # This will be hashed
@@ -59,13 +93,13 @@ class User:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class AuthRequest:
     email: str
     password: str
     name: Optional[str] = None
     
-@dataclass
+@dataclass(slots=True)
 class Document:
     uuid: Optional[str] = None
     title: Optional[str] = None
@@ -75,7 +109,7 @@ class Document:
     updated_at: Optional[datetime] = None
     author: Optional[str] = None
     
-@dataclass
+@dataclass(slots=True)
 class File:
     uuid: Optional[str] = None
     name: Optional[str] = None
@@ -4,9 +4,11 @@ Example script demonstrating how to use the Meta Agent to create and manage AI a
 """
 
 import os
+import asyncio
 from dotenv import load_dotenv
 from agents.meta_agent import (
-    generate_meta_agent_response,
+    agenerate_meta_agent_response,
+    astream_meta_agent_response,
     create_simple_agent,
     list_agents,
     get_agent,
@@ -17,16 +19,31 @@ from data_classes.common_classes import Message, Language
 # Load environment variables
 load_dotenv()
 
-def main():
+# Upper bound on demo calls in flight at once, to stay within API rate limits
+MAX_CONCURRENT_CALLS = 8
+
+async def main():
     """Main function to demonstrate the meta agent capabilities."""
     
     print("🤖 AI Agent Builder - Meta Agent Demo")
     print("=" * 50)
     
+    limiter = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+    
+    async def run(func, *args, **kwargs):
+        # The agent management helpers are blocking; run them off the event loop
+        async with limiter:
+            return await asyncio.to_thread(func, *args, **kwargs)
+    
+    async def ask(messages):
+        async with limiter:
+            return await agenerate_meta_agent_response(messages=messages, language=Language.EN)
+    
     # Example 1: Create a simple agent
     print("\n1. Creating a simple customer service agent...")
     
-    customer_service_agent = create_simple_agent(
+    customer_service_agent = await run(
+        create_simple_agent,
         name="Customer Service Agent",
         description="A helpful customer service agent that can answer common questions",
         system_prompt="""You are a helpful customer service agent. Your role is to:
@@ -42,53 +59,50 @@ Always greet customers warmly and end conversations professionally.""",
     
     print(f"✅ Created agent: {customer_service_agent}")
     
+    # Listing agents and the first meta agent turn are independent; run them together
+    messages = [
+        Message(role="user", content="Hello! I want to create an AI agent that can help with data analysis. Can you help me?")
+    ]
+    agents, response = await asyncio.gather(
+        run(list_agents, author="demo_user"),
+        ask(messages)
+    )
+    
     # Example 2: List all agents
     print("\n2. Listing all agents...")
-    agents = list_agents(author="demo_user")
     print(f"Found {len(agents)} agents:")
     for agent in agents:
         if "error" not in agent:
             print(f"  - {agent.get('name', 'Unknown')} (ID: {agent.get('uuid', 'N/A')})")
     
-    # Example 3: Test an agent
-    if agents and "error" not in agents[0]:
-        agent_id = agents[0].get('uuid')
-        print(f"\n3. Testing agent {agent_id}...")
-        
-        test_result = test_agent(
-            agent_id=agent_id,
-            test_input="Hello, I have a question about my recent order. Can you help me?"
-        )
-        
-        print(f"Test result: {test_result}")
-    
     # Example 4: Using the meta agent for conversation
     print("\n4. Using the meta agent for conversation...")
-    
-    # Create a conversation with the meta agent
-    messages = [
-        Message(role="user", content="Hello! I want to create an AI agent that can help with data analysis. Can you help me?")
-    ]
-    
-    response = generate_meta_agent_response(
-        messages=messages,
-        language=Language.EN
-    )
-    
     print(f"Meta Agent Response: {response}")
     
-    # Continue the conversation
+    # Testing an agent and the follow-up turn are independent of each other
     messages.append(Message(role="assistant", content=response))
     messages.append(Message(role="user", content="What tools should I include for data analysis?"))
     
-    response2 = generate_meta_agent_response(
-        messages=messages,
-        language=Language.EN
-    )
+    pending = [ask(messages)]
+    agent_id = None
+    if agents and "error" not in agents[0]:
+        agent_id = agents[0].get('uuid')
+        pending.append(run(
+            test_agent,
+            agent_id=agent_id,
+            test_input="Hello, I have a question about my recent order. Can you help me?"
+        ))
+    
+    response2, *test_results = await asyncio.gather(*pending)
+    
+    # Example 3: Test an agent
+    if test_results:
+        print(f"\n3. Testing agent {agent_id}...")
+        print(f"Test result: {test_results[0]}")
     
     print(f"Meta Agent Response: {response2}")
 
-def interactive_demo():
+async def interactive_demo():
     """Interactive demo where users can chat with the meta agent."""
     
     print("\n🎯 Interactive Meta Agent Demo")
@@ -98,7 +112,8 @@ def interactive_demo():
     messages = []
     
     while True:
-        user_input = input("\nYou: ").strip()
+        # Read stdin in a worker thread so the event loop stays free
+        user_input = (await asyncio.to_thread(input, "\nYou: ")).strip()
         
         if user_input.lower() in ['quit', 'exit', 'q']:
             print("Goodbye! 👋")
@@ -110,20 +125,16 @@ def interactive_demo():
         # Add user message
         messages.append(Message(role="user", content=user_input))
         
-        # Get response from meta agent
-        try:
-            response = generate_meta_agent_response(
-                messages=messages,
-                language=Language.EN
-            )
-            
-            print(f"\nMeta Agent: {response}")
-            
-            # Add assistant response
-            messages.append(Message(role="assistant", content=response))
-            
-        except Exception as e:
-            print(f"\nError: {e}")
+        # Print the meta agent's reply as it streams in
+        print("\nMeta Agent: ", end="", flush=True)
+        parts = []
+        async for text in astream_meta_agent_response(messages=messages, language=Language.EN):
+            parts.append(text)
+            print(text, end="", flush=True)
+        print()
+        
+        # Add assistant response
+        messages.append(Message(role="assistant", content="".join(parts)))
 
 if __name__ == "__main__":
     # Check if required environment variables are set
@@ -136,9 +147,9 @@ if __name__ == "__main__":
         exit(1)
     
     # Run the demo
-    main()
+    asyncio.run(main())
     
     # Ask if user wants interactive demo
     choice = input("\nWould you like to try the interactive demo? (y/n): ").strip().lower()
     if choice in ['y', 'yes']:
-        interactive_demo() 
\ No newline at end of file
+        asyncio.run(interactive_demo())
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+Gunicorn settings for serving the Flask app in production.
+
+    gunicorn -c gunicorn_conf.py main:app
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:3001")
+workers = int(os.getenv("GUNICORN_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+# Routes mostly wait on Weaviate and OpenAI; threads (or gevent greenlets) let one
+# worker serve many of them at once
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "200"))
+# Uploads and long answers can run well past gunicorn's 30 s default
+timeout = 120
+# Heartbeat files on tmpfs so a slow disk never gets workers killed
+worker_tmp_dir = "/dev/shm"
+
+def on_starting(server):
+    # Create missing collections once in the master, then drop the connection so
+    # workers don't inherit its sockets; each worker connects lazily on first use
+    from libs.weaviate_lib import initialize_schema, close_client
+    initialize_schema()
+    close_client()
+
+def post_fork(server, worker):
+    # gRPC, which the Weaviate client uses, blocks the whole gevent hub unless
+    # it is told to cooperate before the worker opens its first channel
+    if worker_class == "gevent":
+        import grpc.experimental.gevent
+        grpc.experimental.gevent.init_gevent()
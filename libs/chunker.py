@@ -1,17 +1,136 @@
-from typing import List, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_experimental.text_splitter import SemanticChunker
+from langchain_experimental.text_splitter import SemanticChunker, combine_sentences
 from langchain.schema import Document
 from langchain_openai import OpenAIEmbeddings
+from openai import RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 from dotenv import load_dotenv
+from libs.embed_cache import CachedEmbeddings
 
 
 load_dotenv()
 
-# Initialize OpenAI embeddings with proper configuration
-embed_model = OpenAIEmbeddings(
-    model="text-embedding-3-small"  # Using the latest embedding model
-)
+CHUNK_EMBEDDING_MODEL = "text-embedding-3-small"  # Using the latest embedding model
+# Sentences sent per embeddings request, and requests in flight at once
+EMBEDDING_BATCH_SIZE = 128
+EMBEDDING_WORKERS = 4
+
+@lru_cache(maxsize=1)
+def get_embed_model() -> OpenAIEmbeddings:
+    """Create the OpenAI embeddings client on first use."""
+    return OpenAIEmbeddings(
+        model=CHUNK_EMBEDDING_MODEL,
+        chunk_size=EMBEDDING_BATCH_SIZE
+    )
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Embed large sentence lists in length-sorted batches sent concurrently.
+
+    SemanticChunker embeds every sentence of a document in one
+    embed_documents call, which OpenAIEmbeddings splits into sequential
+    requests. Here the texts are sorted by length so each request carries
+    similarly sized inputs, sliced into EMBEDDING_BATCH_SIZE batches, embedded
+    in parallel and restored to the caller's order.
+    """
+
+    def __init__(self, embeddings: Embeddings, batch_size: int = EMBEDDING_BATCH_SIZE, workers: int = EMBEDDING_WORKERS):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.workers = workers
+
+    # Concurrent batches (and concurrent uploads) can trip the provider's rate limit; back off and retry
+    @retry(
+        retry=retry_if_exception_type(RateLimitError),
+        wait=wait_exponential(min=1, max=30),
+        stop=stop_after_attempt(6),
+        reraise=True
+    )
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) <= self.batch_size:
+            return self._embed_batch(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batches = [
+            [texts[i] for i in order[start:start + self.batch_size]]
+            for start in range(0, len(order), self.batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(self._embed_batch, batches)
+        vectors: List[List[float]] = [None] * len(texts)
+        position = 0
+        for batch_vectors in results:
+            for vector in batch_vectors:
+                vectors[order[position]] = vector
+                position += 1
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+# Precision of the unit vectors used for breakpoint distances; adjacent-distance
+# ranks, which is all percentile thresholding uses, survive half precision
+DISTANCE_DTYPE = np.float16
+
+def adjacent_cosine_distances(embeddings: np.ndarray, dtype=DISTANCE_DTYPE) -> np.ndarray:
+    """Cosine distance between each row of an (N, D) matrix and the next row."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = (embeddings / np.where(norms == 0, 1, norms)).astype(dtype, copy=False)
+    return 1 - np.einsum("ij,ij->i", unit[:-1], unit[1:], dtype=np.float32)
+
+# Sentence boundary used by the semantic chunker, compiled once
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.?!])\s+')
+
+class VectorizedSemanticChunker(SemanticChunker):
+    """
+    SemanticChunker whose breakpoint distances are computed in one array pass.
+
+    The upstream implementation calls cosine_similarity once per adjacent
+    sentence pair; here all pairs are computed together from a contiguous
+    embedding matrix.
+    """
+
+    def _get_single_sentences_list(self, text: str) -> List[str]:
+        return SENTENCE_SPLIT_RE.split(text)
+
+    def _calculate_sentence_distances(
+        self, single_sentences_list: List[str]
+    ) -> Tuple[List[float], List[dict]]:
+        sentences = combine_sentences(
+            [{"sentence": x, "index": i} for i, x in enumerate(single_sentences_list)],
+            self.buffer_size
+        )
+        embeddings = self.embeddings.embed_documents(
+            [x["combined_sentence"] for x in sentences]
+        )
+        for sentence, embedding in zip(sentences, embeddings):
+            sentence["combined_sentence_embedding"] = embedding
+        distances = adjacent_cosine_distances(np.asarray(embeddings, dtype=np.float32)).tolist()
+        for sentence, distance in zip(sentences, distances):
+            sentence["distance_to_next"] = distance
+        return distances, sentences
+
+@lru_cache(maxsize=1)
+def get_semantic_chunker() -> VectorizedSemanticChunker:
+    """Build the semantic chunker once; it holds no per-document state."""
+    return VectorizedSemanticChunker(
+        embeddings=CachedEmbeddings(BatchedEmbeddings(get_embed_model()), CHUNK_EMBEDDING_MODEL),
+        buffer_size=1,
+        add_start_index=False,
+        breakpoint_threshold_type='percentile',
+        breakpoint_threshold_amount=None,
+        number_of_chunks=None,
+        sentence_split_regex=SENTENCE_SPLIT_RE.pattern,
+        min_chunk_size=None
+    )
 
 # Semantic Chunking
 def semantic_chunk_text(
@@ -42,17 +161,7 @@ def semantic_chunk_text(
 # sentence_split_regex: str = '(?<=[.?!])\\s+',
 # min_chunk_size: int | None = None,
 # )
-    # Initialize the text splitter
-    text_splitter = SemanticChunker(
-        embeddings=embed_model,
-        buffer_size=1,
-        add_start_index=False,
-        breakpoint_threshold_type='percentile',
-        breakpoint_threshold_amount=None,
-        number_of_chunks=None,
-        sentence_split_regex='(?<=[.?!])\\s+',
-        min_chunk_size=None
-    )
+    text_splitter = get_semantic_chunker()
     
     # Split the text into chunks
     chunks = text_splitter.create_documents([text])
@@ -0,0 +1,45 @@
+import os
+import hashlib
+from functools import lru_cache
+from typing import List
+from diskcache import Cache
+from langchain_core.embeddings import Embeddings
+
+# Directory of the persistent embedding cache
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR") or "/tmp/emb_cache"
+
+@lru_cache(maxsize=1)
+def get_cache() -> Cache:
+    """Open the on-disk embedding cache on first use."""
+    return Cache(EMBED_CACHE_DIR)
+
+def cache_key(model: str, text: str) -> str:
+    """Key an embedding by model and text content."""
+    return f"{model}:{hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()}"
+
+class CachedEmbeddings(Embeddings):
+    """
+    Persist document embeddings on disk keyed by text hash.
+
+    Re-chunking a document that was processed before only embeds sentences
+    that have not been seen yet; everything else is read back from the cache.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str):
+        self.embeddings = embeddings
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cache = get_cache()
+        keys = [cache_key(self.model, text) for text in texts]
+        vectors = [cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            new_vectors = self.embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, new_vectors):
+                cache.set(keys[i], vector)
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,33 @@
+from typing import Any
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes and decodes with orjson.
+
+    Output matches the default provider: keys are sorted, and datetimes are
+    passed through to the default handler so they keep the HTTP date format
+    clients already parse. Dataclasses, UUIDs and plain containers are
+    encoded natively by orjson.
+    """
+
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        # Hand orjson's bytes to the response as-is instead of round-tripping through str
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option | orjson.OPT_APPEND_NEWLINE),
+            mimetype=self.mimetype
+        )
@@ -0,0 +1,43 @@
+import os
+from functools import lru_cache
+from typing import List
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+try:
+    import h2  # noqa: F401 - httpx needs it to negotiate HTTP/2
+    HTTP2 = True
+except ImportError:  # pragma: no cover - h2 is optional
+    HTTP2 = False
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL") or "text-embedding-3-small"
+# Keep-alive connections to the OpenAI API shared by every request thread
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "50"))
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_KEEPALIVE)
+
+# One client per process for completions, summaries and embeddings, so every
+# call reuses the same pooled (HTTP/2 when h2 is installed) connections; built
+# on first use so importing a module that calls OpenAI needs no API key
+@lru_cache(maxsize=1)
+def get_openai_client() -> OpenAI:
+    return OpenAI(api_key=OPENAI_API_KEY, http_client=DefaultHttpxClient(http2=HTTP2, limits=_limits()))
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embed a list of texts with the configured embedding model.
+
+    Args:
+        texts: Texts to embed
+
+    Returns:
+        One embedding vector per input text, in input order
+    """
+    response = get_openai_client().embeddings.create(model=EMBEDDING_MODEL, input=texts)
+    return [item.embedding for item in response.data]
+
+def embed_text(text: str) -> List[float]:
+    """Embed a single text with the configured embedding model."""
+    return embed_texts([text])[0]
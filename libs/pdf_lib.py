@@ -1,12 +1,57 @@
+import hashlib
+import io
+import mmap
+import multiprocessing
 import os
-from typing import List
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Iterable, Iterator, List, Optional
 from pypdf import PdfReader
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pragma: no cover - pypdfium2 is optional
+    pdfium = None
 from langchain.schema import Document
 from libs.chunker import semantic_chunk_text
 
 
 # Allowed file extensions
-ALLOWED_EXTENSIONS = {'pdf'}
+ALLOWED_EXTENSIONS = frozenset({'pdf'})
+
+# Pages chunked together when a PDF is processed page by page
+PAGE_WINDOW = 8
+
+# Worker processes that extract the text of uploaded PDFs
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_lock = Lock()
+
+def iter_pdf_pages(source) -> Iterator[str]:
+    """
+    Yield the text of each page in order.
+
+    Uses the PDFium backend when pypdfium2 is installed and falls back to
+    pypdf's pure-Python extractor otherwise. source is a path, bytes or a
+    readable binary stream.
+    """
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            for page in pdf:
+                yield page.get_textpage().get_text_range()
+        finally:
+            pdf.close()
+    else:
+        reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+def _extract_text(source) -> str:
+    """Extract the text of every page, each followed by a blank line."""
+    return "".join(page + "\n\n" for page in iter_pdf_pages(source))
+
 def read_pdf(file_path: str) -> str:
     """
     Read a PDF file and extract its text content.
@@ -17,18 +62,15 @@ def read_pdf(file_path: str) -> str:
     Returns:
         str: Extracted text from the PDF
     """
-    if not os.path.exists(file_path):
+    try:
+        with open(file_path, "rb") as f:
+            if pdfium is not None:
+                return _extract_text(f)
+            # pypdf seeks around the file; let it read pages straight from the page cache
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return _extract_text(mapped)
+    except FileNotFoundError:
         raise FileNotFoundError(f"PDF file not found at: {file_path}")
-    
-    # Initialize PDF reader
-    reader = PdfReader(file_path)
-    text = ""
-    
-    # Extract text from each page
-    for page in reader.pages:
-        text += page.extract_text() + "\n\n"
-    
-    return text
 
 def process_pdf(
     text: str,
@@ -65,6 +107,45 @@ def process_pdf(
  
  
  
+def process_pdf_pages(
+    pages: Iterable[str],
+    window: int = PAGE_WINDOW
+) -> List[Document]:
+    """
+    Chunk PDF text a window of pages at a time.
+    
+    Only window pages are held and scanned by the chunker at once instead of
+    the whole document. Chunks repeated across window boundaries are dropped.
+    
+    Args:
+        pages (Iterable[str]): Page texts in order, e.g. from iter_pdf_pages
+        window (int): Number of pages chunked together
+        
+    Returns:
+        List[Document]: List of chunked documents
+    """
+    chunks: List[Document] = []
+    seen = set()
+    buffer: List[str] = []
+    
+    def flush():
+        text = "\n\n".join(buffer)
+        buffer.clear()
+        if not text.strip():
+            return
+        for chunk in semantic_chunk_text(text):
+            digest = hashlib.blake2b(chunk.page_content.encode("utf-8"), digest_size=8).digest()
+            if digest not in seen:
+                seen.add(digest)
+                chunks.append(chunk)
+    
+    for page in pages:
+        buffer.append(page)
+        if len(buffer) >= window:
+            flush()
+    flush()
+    return chunks
+
 def allowed_file(filename: str) -> bool:
     """
     Check if the file extension is allowed.
@@ -75,7 +156,8 @@ def allowed_file(filename: str) -> bool:
     Returns:
         bool: True if the file extension is allowed, False otherwise
     """
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    dot = filename.rfind('.')
+    return dot != -1 and filename[dot + 1:].lower() in ALLOWED_EXTENSIONS
 
 def read_pdf_from_buffer(file_buffer) -> str:
     """
@@ -87,12 +169,43 @@ def read_pdf_from_buffer(file_buffer) -> str:
     Returns:
         str: Extracted text from the PDF
     """
-    # Initialize PDF reader with the buffer
-    reader = PdfReader(file_buffer)
-    text = ""
+    return _extract_text(file_buffer.read())
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            # forkserver, because forking the threaded server (request threads, gRPC) is unsafe
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("forkserver")
+            )
+        return _extract_pool
+
+def extract_pdf_pages(file_path: str) -> List[str]:
+    """Return the text of every page of the PDF at file_path, in order."""
+    return list(iter_pdf_pages(file_path))
+
+def read_pdf_pages_in_worker(file_buffer) -> List[str]:
+    """
+    Extract the page texts of an uploaded PDF in a worker process.
     
-    # Extract text from each page
-    for page in reader.pages:
-        text += page.extract_text() + "\n\n"
+    Text extraction is CPU-bound and PDFium is not thread-safe, so uploads
+    handled on different threads extract in separate processes instead. The
+    upload is copied to a temporary file and the worker opens it by path, so
+    the PDF itself is never pickled.
     
-    return text
+    Args:
+        file_buffer: File buffer containing PDF data
+        
+    Returns:
+        List[str]: Page texts in order
+    """
+    stream = getattr(file_buffer, "stream", file_buffer)
+    if stream.seekable():
+        stream.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        shutil.copyfileobj(stream, tmp)
+        tmp.flush()
+        return _get_extract_pool().submit(extract_pdf_pages, tmp.name).result()
+
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Seconds a retrieval result is reused, and number of distinct queries kept.
+# The cache is per process and clear() only reaches the process that changed
+# the documents, so other workers can serve stale results for up to the TTL.
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "60"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2000"))
+
+# Retrieved documents keyed by normalized query, with the time they stop being reused
+_results: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+# Searches currently running, so identical concurrent queries wait on one call
+_inflight: Dict[str, Future] = {}
+# Bumped by clear(), so a search that started before a clear is not cached after it
+_generation = 0
+_lock = Lock()
+
+def query_key(query: str) -> str:
+    """Key a retrieval query by its whitespace- and case-normalized text."""
+    normalized = " ".join(query.split()).lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+def get(query: str) -> Optional[List[Dict[str, Any]]]:
+    """Return the cached documents for a query, or None on a miss or expired entry."""
+    key = query_key(query)
+    with _lock:
+        entry = _results.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _results[key]
+            return None
+        _results.move_to_end(key)
+        return entry[1]
+
+def put(query: str, documents: List[Dict[str, Any]], generation: Optional[int] = None) -> None:
+    """Cache the documents retrieved for a query, unless clear() ran since generation was read."""
+    key = query_key(query)
+    with _lock:
+        if generation is not None and generation != _generation:
+            return
+        _results[key] = (time.monotonic() + QUERY_CACHE_TTL, documents)
+        _results.move_to_end(key)
+        if len(_results) > QUERY_CACHE_SIZE:
+            _results.popitem(last=False)
+
+def clear() -> None:
+    """Drop every cached result in this process; call after the Documents collection changes."""
+    global _generation
+    with _lock:
+        _results.clear()
+        # Searches already running may predate the change; later callers start their own
+        _inflight.clear()
+        _generation += 1
+
+def cached_search(search: Callable[[str], List[Dict[str, Any]]], query: str) -> List[Dict[str, Any]]:
+    """
+    Run search(query) unless a fresh result for the same query is cached.
+
+    Concurrent misses for the same normalized query share a single search call;
+    the callers that arrive while it runs wait for its result (or its error).
+    """
+    documents = get(query)
+    if documents is not None:
+        return documents
+
+    key = query_key(query)
+    with _lock:
+        pending = _inflight.get(key)
+        if pending is None:
+            pending = _inflight[key] = Future()
+            generation = _generation
+            owner = True
+        else:
+            owner = False
+    if not owner:
+        return pending.result()
+
+    try:
+        documents = search(query)
+    except BaseException as e:
+        pending.set_exception(e)
+        raise
+    else:
+        put(query, documents, generation)
+        pending.set_result(documents)
+        return documents
+    finally:
+        with _lock:
+            if _inflight.get(key) is pending:
+                del _inflight[key]
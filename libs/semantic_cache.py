@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import math
+from functools import lru_cache
+from datetime import datetime, UTC
+from typing import List, Optional, Iterable, Tuple
+from weaviate.collections.classes.filters import Filter
+from data_classes.common_classes import Message, language_code
+from libs.open_ai import embed_text
+from libs.weaviate_lib import COLLECTION_RESPONSE_CACHE, insert_to_collection, search_near_vector_collection
+
+logger = logging.getLogger(__name__)
+
+# Minimum certainty for a cached answer to be served instead of calling the LLM
+CACHE_CERTAINTY = 0.92
+# Number of recent user turns blended into the query vector
+CONTEXT_WINDOW = 4
+# Weight of each older turn relative to the next newer one
+TURN_DECAY = 0.5
+
+def scope_key(language, model: str, titles: Iterable[str]) -> str:
+    """
+    Build the cache scope for an answer.
+
+    Answers are only reused between requests with the same language, model
+    and set of retrieved source titles.
+    """
+    raw = "|".join([str(language_code(language)), model, *sorted(titles)])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def query_text(messages: List[Message]) -> Optional[str]:
+    """Return the content of the latest user message, used as the cache query."""
+    for msg in reversed(messages):
+        if msg.role == "user":
+            return msg.content
+    return None
+
+@lru_cache(maxsize=4096)
+def _embed_turn(text: str) -> Tuple[float, ...]:
+    # Earlier turns of a session are re-sent with every request; keep their embeddings
+    return tuple(embed_text(text))
+
+def blend_vectors(vectors: List[Tuple[float, ...]], decay: float = TURN_DECAY) -> List[float]:
+    """
+    Blend turn embeddings, newest first, into one L2-normalized vector.
+
+    The i-th vector is weighted by decay ** i so the latest turn dominates while
+    earlier turns still disambiguate short follow-up questions.
+    """
+    blended = [0.0] * len(vectors[0])
+    for i, vector in enumerate(vectors):
+        weight = decay ** i
+        for j, value in enumerate(vector):
+            blended[j] += weight * value
+    norm = math.sqrt(sum(value * value for value in blended)) or 1.0
+    return [value / norm for value in blended]
+
+def query_vector(messages: List[Message], context_window: int = CONTEXT_WINDOW) -> Optional[List[float]]:
+    """
+    Build the cache query vector for a conversation.
+
+    Embeds the last context_window user turns and blends them so follow-up
+    questions that only make sense with earlier turns still hit the cache.
+    Returns None when there is nothing to embed or the embedding call fails,
+    in which case the caller should skip the cache.
+    """
+    turns = [msg.content for msg in reversed(messages) if msg.role == "user" and msg.content][:context_window]
+    if not turns:
+        return None
+    try:
+        return blend_vectors([_embed_turn(turn) for turn in turns])
+    except Exception:
+        logger.exception("Failed to embed semantic cache query")
+        return None
+
+def lookup(vector: List[float], scope: str) -> Optional[str]:
+    """
+    Find a cached answer similar to the query vector within a scope.
+
+    Args:
+        vector: Query vector
+        scope: Scope key from scope_key()
+
+    Returns:
+        The cached answer, or None on a miss
+    """
+    try:
+        hits = search_near_vector_collection(
+            collection_name=COLLECTION_RESPONSE_CACHE,
+            vector=vector,
+            limit=1,
+            certainty=CACHE_CERTAINTY,
+            properties=["answer"],
+            filters=Filter.by_property("scope").equal(scope)
+        )
+    except Exception:
+        logger.exception("Semantic cache lookup failed")
+        return None
+    return hits[0]["answer"] if hits else None
+
+def store(vector: List[float], scope: str, query: str, answer: str) -> None:
+    """
+    Store an answer in the semantic cache.
+
+    Args:
+        vector: Query vector the answer was generated for
+        scope: Scope key from scope_key()
+        query: Query text, kept for inspection
+        answer: Generated answer
+    """
+    if not answer:
+        return
+    try:
+        insert_to_collection(
+            collection_name=COLLECTION_RESPONSE_CACHE,
+            properties={
+                "query": query,
+                "scope": scope,
+                "answer": answer,
+                "created_at": datetime.now(UTC)
+            },
+            vector=vector
+        )
+    except Exception:
+        logger.exception("Semantic cache store failed")
@@ -0,0 +1,58 @@
+import tempfile
+from typing import List, Mapping, Optional, Tuple, BinaryIO
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.targets import BaseTarget, ValueTarget
+from werkzeug.datastructures import FileStorage
+
+# Bytes read from the request body per parser call
+UPLOAD_READ_SIZE = 64 * 1024
+# Uploaded files larger than this are spooled to a temporary file instead of memory
+UPLOAD_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+class FileStorageListTarget(BaseTarget):
+    """
+    Collect every part of a multipart file field as a werkzeug FileStorage.
+
+    A field may carry several files, so each part gets its own spooled buffer
+    and keeps its own filename and content type.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.files: List[FileStorage] = []
+        self._buffer = None
+
+    def on_start(self):
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_SIZE)
+
+    def on_data_received(self, chunk: bytes):
+        self._buffer.write(chunk)
+
+    def on_finish(self):
+        self._buffer.seek(0)
+        self.files.append(FileStorage(
+            stream=self._buffer,
+            filename=self.multipart_filename or "",
+            content_type=self.multipart_content_type
+        ))
+        self._buffer = None
+
+def parse_upload(headers: Mapping[str, str], stream: BinaryIO) -> Tuple[List[FileStorage], Optional[str]]:
+    """
+    Parse the upload-documents multipart body straight off the request stream.
+
+    Args:
+        headers: Request headers, must include the multipart Content-Type
+        stream: Raw request body stream
+
+    Returns:
+        The uploaded files from the 'files' field and the 'description' value
+    """
+    files = FileStorageListTarget()
+    description = ValueTarget()
+    parser = StreamingFormDataParser(headers={"Content-Type": headers.get("Content-Type", "")})
+    parser.register("files", files)
+    parser.register("description", description)
+    while chunk := stream.read(UPLOAD_READ_SIZE):
+        parser.data_received(chunk)
+    return files.files, description.value.decode("utf-8") if description.value else None
@@ -1,11 +1,19 @@
 import os
-from typing import List, Dict, Any, Optional, TypeVar
+import atexit
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, Dict, Any, Optional, Tuple, TypeVar
 import weaviate
 from weaviate.auth import Auth
+from weaviate.config import ConnectionConfig
 import weaviate.classes as wvc
 from weaviate.collections.classes.grpc import Sorting
 from weaviate.collections.classes.filters import _Filters, Filter
 from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
 # Environment variables
 WEAVIATE_URL = os.getenv("WEAVIATE_URL")
 WEAVIATE_API_KEY = os.getenv("WEAVIATE_API_KEY")
@@ -14,13 +22,33 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 headers = {
     "X-OpenAI-Api-Key": OPENAI_API_KEY,
 }
-client = weaviate.connect_to_weaviate_cloud(
-    cluster_url=WEAVIATE_URL,                     # Weaviate URL: "REST Endpoint" in Weaviate Cloud console
-    auth_credentials=Auth.api_key(WEAVIATE_API_KEY),  # Weaviate API key: "ADMIN" API key in Weaviate Cloud console
-    headers=headers
-)
+# HTTP connection pool shared by all threads using the client
+WEAVIATE_POOL_CONNECTIONS = int(os.getenv("WEAVIATE_POOL_CONNECTIONS", "20"))
+WEAVIATE_POOL_MAXSIZE = int(os.getenv("WEAVIATE_POOL_MAXSIZE", "100"))
+@lru_cache(maxsize=1)
+def get_client() -> weaviate.WeaviateClient:
+    """Connect to Weaviate on first use and reuse the connection afterwards."""
+    return weaviate.connect_to_weaviate_cloud(
+        cluster_url=WEAVIATE_URL,                     # Weaviate URL: "REST Endpoint" in Weaviate Cloud console
+        auth_credentials=Auth.api_key(WEAVIATE_API_KEY),  # Weaviate API key: "ADMIN" API key in Weaviate Cloud console
+        headers=headers,
+        additional_config=wvc.init.AdditionalConfig(
+            # One shared client serves every thread; keep enough pooled HTTP connections for them
+            connection=ConnectionConfig(
+                session_pool_connections=WEAVIATE_POOL_CONNECTIONS,
+                session_pool_maxsize=WEAVIATE_POOL_MAXSIZE,
+                session_pool_max_retries=3
+            ),
+            # Concurrent insert shards can take longer than the default insert timeout
+            timeout=wvc.init.Timeout(insert=120)
+        )
+    )
 def close_client():
-    client.close()
+    if get_client.cache_info().currsize:
+        get_client().close()
+        get_client.cache_clear()
+# Whatever server runs the app, close the shared client's connections on interpreter exit
+atexit.register(close_client)
 COLLECTION_DOCUMENTS = "Documents"
 COLLECTION_MESSAGES = "Messages"
 COLLECTION_SECTIONS = "Sections"
@@ -28,162 +56,210 @@ COLLECTION_USERS = "Users"
 COLLECTION_FILES = "Files"
 COLLECTION_TOKEN_BLACKLIST = "TokenBlacklist"
 COLLECTION_AGENTS = "Agents"
+COLLECTION_RESPONSE_CACHE = "ResponseCache"
+COLLECTION_SUMMARIES = "Summaries"
+
+# Objects per batch request and batch requests in flight during document upload
+UPLOAD_BATCH_SIZE = 200
+UPLOAD_CONCURRENT_REQUESTS = 8
+# Objects per insert_many call and calls in flight in insert_to_collection_in_batch
+INSERT_SHARD_SIZE = 200
+INSERT_WORKERS = 8
+# Threads running the count alongside a page fetch in search_non_vector_collection_with_count
+COUNT_WORKERS = 8
+_count_pool = ThreadPoolExecutor(max_workers=COUNT_WORKERS, thread_name_prefix="weaviate-count")
+# Maximum cosine distance of documents returned by search_documents (certainty 0.7)
+DOCUMENT_MAX_DISTANCE = 0.6
+
+def _openai_vectorizer():
+    return wvc.config.Configure.Vectorizer.text2vec_openai(model=EMBEDDING_MODEL)
+
+def _compressed_hnsw_index():
+    # Large, growing collections: HNSW with product quantization keeps vectors small enough to stay in memory.
+    # Segments are left to the server so the config fits any embedding model's dimensions.
+    return wvc.config.Configure.VectorIndex.hnsw(
+        ef_construction=256,
+        max_connections=16,
+        quantizer=wvc.config.Configure.VectorIndex.Quantizer.pq(training_limit=100000)
+    )
+
+def _small_flat_index():
+    # Small collections: a binary-quantized flat index is cheaper than maintaining an HNSW graph
+    return wvc.config.Configure.VectorIndex.flat(
+        quantizer=wvc.config.Configure.VectorIndex.Quantizer.bq()
+    )
+
+# (collection name, vectorizer config, vector index config, properties) for every collection the app uses
+SCHEMAS = [
+    (COLLECTION_DOCUMENTS, _openai_vectorizer(), _compressed_hnsw_index(), [
+        wvc.config.Property(name="title", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="content", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="description", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+        wvc.config.Property(name="file_id", data_type=wvc.config.DataType.UUID),
+    ]),
+    (COLLECTION_MESSAGES, _openai_vectorizer(), _compressed_hnsw_index(), [
+        wvc.config.Property(name="session_id", data_type=wvc.config.DataType.UUID),
+        wvc.config.Property(name="content", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="role", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+    ]),
+    (COLLECTION_SECTIONS, _openai_vectorizer(), _compressed_hnsw_index(), [
+        wvc.config.Property(name="title", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="content", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="order", data_type=wvc.config.DataType.INT),
+        wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+        wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE),
+        wvc.config.Property(name="author", data_type=wvc.config.DataType.TEXT),
+    ]),
+    (COLLECTION_USERS, _openai_vectorizer(), _small_flat_index(), [
+        wvc.config.Property(name="email", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="password", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="name", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+        wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE),
+    ]),
+    (COLLECTION_FILES, _openai_vectorizer(), _small_flat_index(), [
+        wvc.config.Property(name="name", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="path", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+        wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE),
+        wvc.config.Property(name="author", data_type=wvc.config.DataType.TEXT),
+    ]),
+    (COLLECTION_TOKEN_BLACKLIST, None, None, [
+        wvc.config.Property(name="token", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="jti_hash", data_type=wvc.config.DataType.TEXT, tokenization=wvc.config.Tokenization.FIELD),
+        wvc.config.Property(name="user_id", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="blacklisted_at", data_type=wvc.config.DataType.DATE),
+        wvc.config.Property(name="expires_at", data_type=wvc.config.DataType.DATE),
+    ]),
+    (COLLECTION_AGENTS, _openai_vectorizer(), _small_flat_index(), [
+        wvc.config.Property(name="name", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="description", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="system_prompt", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="tools", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="model", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="temperature", data_type=wvc.config.DataType.NUMBER),
+        wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+        wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE),
+        wvc.config.Property(name="author", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="status", data_type=wvc.config.DataType.TEXT),
+    ]),
+    # Vectors are computed by the caller (see libs/semantic_cache.py)
+    (COLLECTION_RESPONSE_CACHE, wvc.config.Configure.Vectorizer.none(), None, [
+        wvc.config.Property(name="query", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="scope", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="answer", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+    ]),
+    (COLLECTION_SUMMARIES, None, None, [
+        wvc.config.Property(name="key", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="kind", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="summary", data_type=wvc.config.DataType.TEXT),
+        wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+    ]),
+]
 
+# Collections and properties are only ever added, so once they exist a process never needs to check again
+@lru_cache(maxsize=1)
 def initialize_schema() -> None:
-    """Initialize the Weaviate schema if it doesn't exist."""
-    exists = client.collections.exists(COLLECTION_DOCUMENTS)
-    if not exists:
+    """Initialize the Weaviate schema if it doesn't exist, adding properties missing from existing collections."""
+    client = get_client()
+    # One listing round-trip instead of an exists() call per collection
+    existing = client.collections.list_all(simple=True)
+    for name, vectorizer_config, vector_index_config, properties in SCHEMAS:
+        if name in existing:
+            # Properties added to SCHEMAS after the collection was created, e.g. TokenBlacklist.jti_hash
+            known = {prop.name for prop in existing[name].properties}
+            for prop in properties:
+                if prop.name not in known:
+                    client.collections.get(name).config.add_property(prop)
+                    logger.info("Property %s.%s added", name, prop.name)
+            continue
         client.collections.create(
-            name=COLLECTION_DOCUMENTS,
-            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(
-                model=EMBEDDING_MODEL
-            ),
-            properties=[
-                wvc.config.Property(name="title", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="content", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="description", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="file_id", data_type=wvc.config.DataType.UUID),
-            ]
-        )
-        print("🙌🏼 Collection Documents created successfully")
-    exists = client.collections.exists(COLLECTION_MESSAGES)
-    if not exists:
-        client.collections.create(
-            name=COLLECTION_MESSAGES,
-            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(
-                model=EMBEDDING_MODEL
-            ),
-            properties=[
-                wvc.config.Property(name="session_id", data_type=wvc.config.DataType.UUID),
-                wvc.config.Property(name="content", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="role", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
-            ]
-        )
-        print("🙌🏼 Collection Messages created successfully")
-    exists = client.collections.exists(COLLECTION_SECTIONS)
-    if not exists:
-        client.collections.create(
-            name=COLLECTION_SECTIONS,
-            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(
-                model=EMBEDDING_MODEL
-            ),
-            properties=[
-                wvc.config.Property(name="title", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="content", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="order", data_type=wvc.config.DataType.INT),
-                wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="author", data_type=wvc.config.DataType.TEXT),
-            ]
-        )
-        print("🙌🏼 Collection Sections created successfully")
-    exists = client.collections.exists(COLLECTION_USERS)
-    if not exists:
-        client.collections.create(
-            name=COLLECTION_USERS,
-            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(
-                model=EMBEDDING_MODEL
-            ),
-            properties=[
-                wvc.config.Property(name="email", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="password", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="name", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE), 
-            ]
+            name=name,
+            vectorizer_config=vectorizer_config,
+            vector_index_config=vector_index_config,
+            properties=properties
         )
-        print("🙌🏼 Collection Users created successfully")
-    exists = client.collections.exists(COLLECTION_FILES)
-    if not exists:
-        client.collections.create(
-            name=COLLECTION_FILES,
-            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(
-                model=EMBEDDING_MODEL
-            ),
-            properties=[
-                wvc.config.Property(name="name", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="path", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="author", data_type=wvc.config.DataType.TEXT),
-            ]
-        )
-        print("🙌🏼 Collection Files created successfully")
-    exists = client.collections.exists(COLLECTION_TOKEN_BLACKLIST)
-    if not exists:
-        client.collections.create(
-            name=COLLECTION_TOKEN_BLACKLIST,
-            properties=[
-                wvc.config.Property(name="token", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="user_id", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="blacklisted_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="expires_at", data_type=wvc.config.DataType.DATE),
-            ]
-        )
-        print("🙌🏼 Collection TokenBlacklist created successfully")
-    exists = client.collections.exists(COLLECTION_AGENTS)
-    if not exists:
-        client.collections.create(
-            name=COLLECTION_AGENTS,
-            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(
-                model=EMBEDDING_MODEL
-            ),
-            properties=[
-                wvc.config.Property(name="name", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="description", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="system_prompt", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="tools", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="model", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="temperature", data_type=wvc.config.DataType.NUMBER),
-                wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="author", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="status", data_type=wvc.config.DataType.TEXT),
-            ]
-        )
-        print("🙌🏼 Collection Agents created successfully")
-    print("🙌🏼 Schema initialized successfully")
+        logger.info("Collection %s created", name)
+    logger.info("Schema initialized")
 
-def upload_documents(documents: List[Dict[str, str]]) -> Dict[str, Any]:
+def upload_documents(documents: List[Dict[str, str]], batch_size: int = UPLOAD_BATCH_SIZE) -> Dict[str, Any]:
     """
     Upload documents to Weaviate.
     
     Args:
         documents: List of dictionaries containing 'title' and 'content' keys
+        batch_size: Objects sent per batch request
     
     Returns:
         Response from Weaviate
     """
-    data_objects = []
-    
-    for doc in documents:
-        data_objects.append({
+    now = datetime.now()
+    data_objects = (
+        {
             "title": doc["title"],
             "content": doc["content"],
             "description": doc["description"],
             "author": doc["author"],
             "file_id": doc["file_id"],
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-        })
+            "created_at": now,
+            "updated_at": now,
+        }
+        for doc in documents
+    )
+    return _batch_insert_documents(data_objects, batch_size)
+
+def upload_document_contents(
+    contents: Iterable[str],
+    title: str,
+    file_id: str,
+    description: str,
+    author: str,
+    batch_size: int = UPLOAD_BATCH_SIZE
+) -> List[Any]:
+    """
+    Upload chunks of one file that share every property except their content.
+    
+    Each object is built only as it is handed to the batch, so no per-chunk
+    dict is kept around beyond the batch buffer.
     
-    # response = 
-    collection = client.collections.get(COLLECTION_DOCUMENTS)
+    Returns:
+        The objects that failed to import
+    """
+    now = datetime.now()
+    data_objects = (
+        {
+            "title": title,
+            "content": content,
+            "description": description,
+            "author": author,
+            "file_id": file_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for content in contents
+    )
+    return _batch_insert_documents(data_objects, batch_size)
+
+def _batch_insert_documents(data_objects: Iterable[Dict[str, Any]], batch_size: int) -> List[Any]:
+    collection = get_client().collections.get(COLLECTION_DOCUMENTS)
 
-    with collection.batch.fixed_size(batch_size=200) as batch:
+    # Keep several batch requests in flight so vectorization and network time overlap
+    with collection.batch.fixed_size(batch_size=batch_size, concurrent_requests=UPLOAD_CONCURRENT_REQUESTS) as batch:
         for data_object in data_objects:
             batch.add_object(
                 properties=data_object,
             )
             if batch.number_errors > 10:
-                print("Batch import stopped due to excessive errors.")
+                logger.error("Batch import stopped due to excessive errors")
                 break
     failed_objects = collection.batch.failed_objects
     if failed_objects:
-        print(f"Number of failed imports: {len(failed_objects)}")
-        print(f"First failed object: {failed_objects[0]}")
+        logger.error("Number of failed imports: %d", len(failed_objects))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("First failed object: %r", failed_objects[0])
 
     
     return failed_objects
@@ -199,15 +275,16 @@ def search_documents(query: str, limit: int = 3) -> list[dict]:
     Returns:
         List of matching documents
     """
-    collection = client.collections.get(COLLECTION_DOCUMENTS)
+    collection = get_client().collections.get(COLLECTION_DOCUMENTS)
     response = collection.query.near_text(
         query=query,
         limit=limit,
-        certainty=0.7,
-        
+        # Filter on the index's native distance rather than the derived certainty
+        distance=DOCUMENT_MAX_DISTANCE,
+        include_vector=False,
     )
-    # Each object in response.objects contains .properties with your fields
-    return [obj.properties for obj in response.objects]
+    # Each object in response.objects contains .properties with your fields, and uuid
+    return [{"uuid": obj.uuid, **obj.properties} for obj in response.objects]
 
 def search_non_vector_collection(
     collection_name: str,
@@ -232,7 +309,7 @@ def search_non_vector_collection(
     Returns:
         List of matching collection
     """
-    collection = client.collections.get(collection_name)
+    collection = get_client().collections.get(collection_name)
     response = collection.query.fetch_objects(
         limit=limit,
         return_properties=properties,
@@ -268,7 +345,7 @@ def search_vector_collection(
     Returns:
         List of matching collection
     """
-    collection = client.collections.get(collection_name)
+    collection = get_client().collections.get(collection_name)
     response = collection.query.near_text(
         query=query,
         limit=limit,
@@ -276,37 +353,97 @@ def search_vector_collection(
         filters=filters,
         offset=offset,
         sort=sort,
+        include_vector=False,
+    )
+    # Each object in response.objects contains .properties with your fields, and uuid
+    return [{"uuid": obj.uuid, **obj.properties} for obj in response.objects]
+
+def search_near_vector_collection(
+    collection_name: str,
+    vector: List[float],
+    limit: int = 1,
+    certainty: Optional[float] = None,
+    properties: List[str] = [],
+    filters: Optional[_Filters] = None,
+) -> list[dict]:
+    """
+    Search a collection by a caller-provided vector.
+
+    Args:
+        collection_name: Name of the collection to search
+        vector: Query vector
+        limit: Maximum number of results to return
+        certainty: Minimum certainty of returned objects
+        properties: List of properties to return
+        filters: Filters to apply to the search
+
+    Returns:
+        List of matching collection
+    """
+    collection = get_client().collections.get(collection_name)
+    response = collection.query.near_vector(
+        near_vector=vector,
+        limit=limit,
+        certainty=certainty,
+        return_properties=properties,
+        filters=filters,
     )
-    # Each object in response.objects contains .properties with your fields
-    return [obj.properties for obj in response.objects]
+    return [{"uuid": obj.uuid, **obj.properties} for obj in response.objects]
 
 T = TypeVar('T', bound=Dict[str, Any])
 
 def insert_to_collection(
     collection_name: str,
     properties: T,
-    uuid: Optional[str] = None
+    uuid: Optional[str] = None,
+    vector: Optional[List[float]] = None
 ) -> str:
     # Get the collection
-    collection = client.collections.get(collection_name)
+    collection = get_client().collections.get(collection_name)
 
     # Insert a single object
     if uuid:
-        uuid = collection.data.insert(properties=properties, uuid=uuid)
+        uuid = collection.data.insert(properties=properties, uuid=uuid, vector=vector)
     else:
-        uuid = collection.data.insert(properties=properties)
+        uuid = collection.data.insert(properties=properties, vector=vector)
 
     return uuid
 
 def insert_to_collection_in_batch(
     collection_name: str,
-    properties: List[T]
+    properties: List[T],
+    shard_size: int = INSERT_SHARD_SIZE,
+    workers: int = INSERT_WORKERS
 ) -> List[str]:
+    """
+    Insert many objects, splitting large lists into shards inserted concurrently.
+
+    Returns:
+        UUIDs of the inserted objects, in input order
+
+    Raises:
+        Exception: If any object failed to insert; the others stay inserted
+    """
     # Get the collection
-    collection = client.collections.get(collection_name)
-    # Insert a single object
-    uuids = collection.data.insert_many(properties)
-    return uuids
+    collection = get_client().collections.get(collection_name)
+    shards = [properties[i:i + shard_size] for i in range(0, len(properties), shard_size)]
+    if len(shards) <= 1:
+        results = [collection.data.insert_many(properties)]
+    else:
+        # gRPC calls release the GIL, so the shards overlap on the wire
+        with ThreadPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+            results = list(executor.map(collection.data.insert_many, shards))
+    # Error keys are indices within their shard; report them as input indices
+    failed_objects = {
+        shard_index * shard_size + index: error
+        for shard_index, result in enumerate(results)
+        for index, error in result.errors.items()
+    }
+    if failed_objects:
+        for index, error in sorted(failed_objects.items()):
+            logger.error("Failed to insert object %d into %s: %s", index, collection_name, error.message)
+        raise Exception(f"Failed to insert {len(failed_objects)} of {len(properties)} objects into {collection_name}")
+    return [uuid for result in results for _, uuid in sorted(result.uuids.items())]
 
 
 
@@ -316,7 +453,7 @@ def update_collection_object(
     properties: T
 ) -> bool:
     # Get the collection
-    collection = client.collections.get(collection_name)
+    collection = get_client().collections.get(collection_name)
     # Update a single object
     collection.data.update(properties=properties, uuid=uuid)
     return True
@@ -324,19 +461,19 @@ def update_collection_object(
 def delete_collection_object(
     collection_name: str,
     uuid: str
-) -> str:
+) -> bool:
+    """Delete a single object. Returns False if no object has that UUID."""
     # Get the collection
-    collection = client.collections.get(collection_name)
+    collection = get_client().collections.get(collection_name)
     # Delete a single object
-    collection.data.delete_by_id(uuid)
-    return uuid
+    return collection.data.delete_by_id(uuid)
 
 def delete_collection_objects_many(
     collection_name: str,
     filters: Optional[_Filters] = None
 ) -> bool:
     # Get the collection
-    collection = client.collections.get(collection_name)
+    collection = get_client().collections.get(collection_name)
     # Delete a single object
     collection.data.delete_many(where=filters)
     return True
@@ -355,7 +492,7 @@ def get_collection_count(
     Returns:
         Total count of objects matching the filters
     """
-    collection = client.collections.get(collection_name)
+    collection = get_client().collections.get(collection_name)
     
     # Use aggregate to get count
     response = collection.aggregate.over_all(
@@ -363,3 +500,35 @@ def get_collection_count(
     )
     
     return response.total_count
+
+def search_non_vector_collection_with_count(
+    collection_name: str,
+    limit: int = 100,
+    properties: List[str] = [],
+    filters: Optional[_Filters] = None,
+    offset: Optional[int] = None,
+    sort: Optional[Sorting] = None,
+    count_filters: Optional[_Filters] = None,
+) -> Tuple[list[dict], int]:
+    """
+    Fetch one page of a collection together with the total count matching the same filters.
+
+    The count aggregate runs on another thread while the page is fetched, so
+    a paginated listing costs one round-trip of latency instead of two.
+    count_filters replaces filters for the count, e.g. when filters also
+    carries a keyset cursor.
+
+    Returns:
+        Tuple of (matching objects for the page, total count)
+    """
+    total_count = _count_pool.submit(get_collection_count, collection_name, count_filters or filters)
+    objects = search_non_vector_collection(
+        collection_name=collection_name,
+        limit=limit,
+        properties=properties,
+        filters=filters,
+        offset=offset,
+        sort=sort,
+    )
+    return objects, total_count.result()
+
@@ -1,12 +1,19 @@
-from flask import Flask, request, jsonify, Response, g
+from flask import Flask, request, jsonify, Response, g, stream_with_context
 from flask_cors import CORS
 from functools import wraps
+from werkzeug.exceptions import HTTPException, BadRequest
+from typing import Any, Iterable, List, Optional, Tuple
 from services.upload_file import upload_file
+from libs.upload_lib import parse_upload
+import os
+import sys
+import uuid
+from datetime import datetime
+import signal
 import logging
-from libs.weaviate_lib import initialize_schema, close_client
-from contextlib import contextmanager
+from libs.weaviate_lib import initialize_schema, UPLOAD_BATCH_SIZE
 from services.handle_ask import  handle_ask_streaming, handle_ask_non_streaming, AskError
-from services.handle_auth import sign_in, sign_up, verify_jwt_token, AuthError, blacklist_token
+from services.handle_auth import sign_in, sign_up, verify_jwt_token_cached, AuthError, blacklist_token
 from data_classes.common_classes import AskRequest, Message, Section, AuthRequest, Language, Document, File
 from services.handle_messages import handle_chat
 from services.handle_sections import (
@@ -29,15 +36,32 @@ from agents.meta_agent import (
     generate_agent_code,
     test_agent
 )
-import json
+from libs.json_provider import ORJSONProvider, orjson
 
 app = Flask(__name__)
-CORS(app, expose_headers=["X-Total-Count", "X-Page-Size", "X-Page-Number", "X-Total-Pages"])
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+# Browsers may cache preflight results for a day instead of preflighting every call
+CORS(
+    app,
+    resources={r"/api/*": {}},
+    expose_headers=["X-Total-Count", "X-Page-Size", "X-Page-Number", "X-Total-Pages", "X-Next-Cursor"],
+    max_age=86400
+)
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+# Set LOG_LEVEL=WARNING in production so debug/info records are never formatted
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), handlers=[logging.StreamHandler()], force=True)
 logger = logging.getLogger(__name__)
 
+# Upper bound on the batch_size a client may request for document uploads
+MAX_UPLOAD_BATCH_SIZE = 1000
+# Upper bound on the page size of list and search endpoints
+MAX_PAGE_LIMIT = 1000
+# Seconds a client may reuse a cacheable GET response without asking again
+CACHE_MAX_AGE = 300
+BEARER_PREFIX = "Bearer "
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -45,227 +69,257 @@ def login_required(f):
         if not auth_header:
             return jsonify({"error": "No authorization header"}), 401
 
+        # Extract token from "Bearer <token>"
+        if not auth_header.startswith(BEARER_PREFIX):
+            return jsonify({"error": "Invalid token"}), 401
+        token = auth_header[len(BEARER_PREFIX):]
+
         try:
-            # Extract token from "Bearer <token>"
-            token = auth_header.split(" ")[1]
-            payload = verify_jwt_token(token)
+            payload = verify_jwt_token_cached(token)
             g.user_id = payload['user_id']
-            return f(*args, **kwargs)
+            g.token = token
         except AuthError as e:
             return jsonify({"error": e.message}), e.status_code
         except Exception as e:
             return jsonify({"error": "Invalid token"}), 401
+        # Errors raised by the view itself go to the app's error handlers
+        return f(*args, **kwargs)
 
     return decorated_function
 
+@app.errorhandler(AuthError)
+@app.errorhandler(AskError)
+def handle_service_error(e):
+    """Service errors carry their own message and status code."""
+    return jsonify({"error": e.message}), e.status_code
+
+@app.errorhandler(Exception)
+def handle_unexpected_error(e):
+    """Log unhandled route errors once and report them as a 500."""
+    if isinstance(e, HTTPException):
+        return e
+    logger.exception("Error handling %s %s", request.method, request.path)
+    return jsonify({"error": str(e)}), 500
+
+def pagination(default_limit: int = 10) -> Tuple[int, int]:
+    """Read limit and offset from the query string, capping limit at MAX_PAGE_LIMIT."""
+    try:
+        limit = int(request.args.get('limit', default_limit))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        raise BadRequest("limit and offset must be integers")
+    return min(max(limit, 1), MAX_PAGE_LIMIT), max(offset, 0)
+
+def parse_messages(raw: Any) -> List[Message]:
+    """Build Message objects from a request's messages array, rejecting malformed entries with a 400."""
+    if not isinstance(raw, list):
+        raise BadRequest("messages must be a list")
+    try:
+        return [Message(msg['role'], msg['content'], msg.get('session_id'), msg.get('created_at')) for msg in raw]
+    except (KeyError, TypeError, AttributeError):
+        raise BadRequest("each message needs a role and content")
+
+def keyset_cursor() -> Tuple[Optional[datetime], Optional[uuid.UUID]]:
+    """
+    Read the 'before' cursor from the query string, if any.
+
+    The cursor is an ISO 8601 created_at, optionally followed by '_' and the
+    uuid of the same row as a tiebreaker.
+    """
+    before = request.args.get('before')
+    if not before:
+        return None, None
+    timestamp, _, section_id = before.partition('_')
+    try:
+        return datetime.fromisoformat(timestamp), uuid.UUID(section_id) if section_id else None
+    except ValueError:
+        raise BadRequest("before must be an ISO 8601 timestamp, optionally followed by '_' and a uuid")
+
+def format_cursor(value: Any, row_id: Any) -> str:
+    """Format a created_at value and row uuid as a cursor; 'Z' instead of '+00:00' keeps it URL-safe."""
+    if isinstance(value, datetime):
+        value = value.isoformat().replace("+00:00", "Z")
+    return f"{value}_{row_id}"
+
+def cached_json_response(obj: Any) -> Response:
+    """
+    JSON response that clients may reuse for CACHE_MAX_AGE seconds and then revalidate.
+
+    The ETag is a hash of the body, so a matching If-None-Match gets an empty 304.
+    Responses are marked private because every route sits behind login_required.
+    """
+    response = jsonify(obj)
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    return response.make_conditional(request)
+
+def json_array_response(items: Iterable[Any]) -> Response:
+    """Stream a JSON array element by element instead of encoding the whole page into one body."""
+    def generate():
+        yield "["
+        for i, item in enumerate(items):
+            yield ("," if i else "") + app.json.dumps(item)
+        yield "]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+def set_pagination_headers(response: Response, total_count: int, limit: int, offset: int) -> None:
+    """Describe the returned page in the X-Total-Count / X-Page-* headers exposed through CORS."""
+    response.headers.update({
+        'X-Total-Count': str(total_count),
+        'X-Page-Size': str(limit),
+        'X-Page-Number': str(offset // limit + 1),
+        'X-Total-Pages': str((total_count + limit - 1) // limit)
+    })
+
 @app.route('/api/v1/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy"}), 200
 
-@contextmanager
-def weaviate_connection():
-    try:
-        yield
-    finally:
-        close_client()
-        
 @app.route('/api/v1/upload-documents', methods=['POST'])
 @login_required
 def process_pdf_endpoint():
-    """Endpoint to process a PDF file and return semantic chunks"""
-    if request.method == "OPTIONS":
-        return jsonify({"status": "ok"}), 200
-
+    """
+    Endpoint to process a PDF file and return semantic chunks
+
+    Multipart fields: files (one or more PDFs), description.
+    Query parameters: batch_size, objects per Weaviate batch request
+    (default UPLOAD_BATCH_SIZE, capped at MAX_UPLOAD_BATCH_SIZE). Keep it in the
+    hundreds: much larger batches hit vectorizer rate limits and memory spikes.
+    """
+    # 1. prepare payload
     try:
-        # 1. prepare payload
-        files = request.files.getlist('files')
-        description = request.form.get('description')
-        author = g.user_id
-        # 2. handle request
-        results, failed_objects = upload_file(files, description, author)
-
-        # 3. return results
-        return jsonify({
-            "status": "success" if failed_objects == 0 else "failed",
-            "description": description,
-            "results": results,
-            "failed_objects": failed_objects
-        }), 200
-
-    except Exception as e:
-        logger.error(f"Error processing PDF: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        batch_size = int(request.args.get('batch_size', UPLOAD_BATCH_SIZE))
+    except ValueError:
+        raise BadRequest("batch_size must be an integer")
+    batch_size = min(max(batch_size, 1), MAX_UPLOAD_BATCH_SIZE)
+    # Parse the multipart body straight off the stream; request.files/form must not be touched
+    files, description = parse_upload(request.headers, request.stream)
+    author = g.user_id
+    # 2. handle request
+    results, failed_objects = upload_file(files, description, author, batch_size=batch_size)
+
+    # 3. return results
+    return jsonify({
+        "status": "success" if failed_objects == 0 else "failed",
+        "description": description,
+        "results": results,
+        "failed_objects": failed_objects
+    }), 200
 
 @app.route('/api/v1/sign-in', methods=['POST'])
 def sign_in_endpoint():
     """Sign in endpoint"""
-    try:
-        body = request.json
-        auth_request = AuthRequest(**body)
-        result = sign_in(auth_request)
-        return jsonify(result), 200
-    except AuthError as e:
-        return jsonify({"error": e.message}), e.status_code
-    except Exception as e:
-        logger.error(f"Error signing in: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    body = request.json
+    auth_request = AuthRequest(**body)
+    result = sign_in(auth_request)
+    return jsonify(result), 200
 
 @app.route('/api/v1/sign-up', methods=['POST'])
 def sign_up_endpoint():
     """Sign up endpoint"""
-    try:
-        body = request.json
-        auth_request = AuthRequest(**body)
-        result = sign_up(auth_request)
-        return jsonify(result), 201
-    except AuthError as e:
-        return jsonify({"error": e.message}), e.status_code
-    except Exception as e:
-        logger.error(f"Error signing up: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    body = request.json
+    auth_request = AuthRequest(**body)
+    result = sign_up(auth_request)
+    return jsonify(result), 201
 
 @app.route('/api/v1/chat/<session_id>/ask', methods=['POST'])
 @login_required
 def ask_endpoint(session_id):
-    try:
-        # 1. prepare payload
-        body = request.json
-        messages = [Message(**msg) for msg in body.get('messages', [])]
-        ask_request = AskRequest(
-            messages=messages,
-            session_id=session_id,
-            language=body.get('language', Language.VI),
-            options=body.get('options'),
-            model=body.get('model', 'gpt-4o')
-        )
-
-        # 2. handle request
-        is_streaming = ask_request.options and ask_request.options.get("stream", False)
-        try:
-            if is_streaming:
-                return handle_ask_streaming(ask_request)
-            else:
-                results = handle_ask_non_streaming(ask_request)
-                return jsonify(results), 200
-        except AskError as e:
-            return Response(
-                response=json.dumps({"error": e.message}),
-                status=e.status_code,
-                mimetype="application/json"
-            )
-    except Exception as e:
-        logger.error(f"Error processing ask: {str(e)}")
-        return Response(
-            response=json.dumps({"error": str(e)}),
-            status=500,
-            mimetype="application/json"
-        )
+    # 1. prepare payload
+    body = request.json
+    messages = parse_messages(body.get('messages', []))
+    ask_request = AskRequest(
+        messages=messages,
+        session_id=session_id,
+        language=body.get('language', Language.VI),
+        options=body.get('options'),
+        model=body.get('model', 'gpt-4o')
+    )
+
+    # 2. handle request
+    is_streaming = ask_request.options and ask_request.options.get("stream", False)
+    if is_streaming:
+        # Only clients that ask for server-sent events get the framed stream
+        sse = "text/event-stream" in request.accept_mimetypes.values()
+        return handle_ask_streaming(ask_request, sse=sse)
+    results = handle_ask_non_streaming(ask_request)
+    return jsonify(results), 200
 
 @app.route('/api/v1/sections/<section_id>/messages', methods=['GET'])
 @login_required
 def chat_endpoint(section_id):
-    try:
-        results = handle_chat(section_id)
-        return jsonify(results), 200
-    except Exception as e:
-        logger.error(f"Error processing chat: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    results = handle_chat(section_id)
+    return jsonify(results), 200
 
 # manage sections
 @app.route('/api/v1/sections', methods=['POST'])
 @login_required
 def create_section_endpoint():
     """Create a new section"""
-    try:
-        body = request.json
-        section = Section(**body)
-        section.author = g.user_id
-        section = create_section(section)
-        return jsonify(section), 201
-    except Exception as e:
-        logger.error(f"Error creating section: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    body = request.json
+    section = Section(**body)
+    section.author = g.user_id
+    section = create_section(section)
+    return jsonify(section), 201
 
 @app.route('/api/v1/sections', methods=['GET'])
 @login_required
 def get_sections_endpoint():
     """Get all sections with pagination"""
-    try:
-        # get email from jwt token
-        email = g.user_id
-        print(email)
-        limit = int(request.args.get('limit', 10))
-        offset = int(request.args.get('offset', 0))
-        sections, total_count = get_sections(email, limit, offset)
-        
-        # Calculate pagination info
-        page_number = (offset // limit) + 1 if limit > 0 else 1
-        total_pages = (total_count + limit - 1) // limit if limit > 0 else 1
-        
-        response = jsonify(sections)
-        response.headers['X-Total-Count'] = str(total_count)
-        response.headers['X-Page-Size'] = str(limit)
-        response.headers['X-Page-Number'] = str(page_number)
-        response.headers['X-Total-Pages'] = str(total_pages)
-        return response, 200
-    except Exception as e:
-        logger.error(f"Error getting sections: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    # get email from jwt token
+    email = g.user_id
+    logger.debug("Listing sections for %s", email)
+    limit, offset = pagination()
+    before, before_id = keyset_cursor()
+    sections, total_count = get_sections(email, limit, offset, before, before_id)
+    
+    response = json_array_response(sections)
+    set_pagination_headers(response, total_count, limit, 0 if before else offset)
+    if len(sections) == limit:
+        # Pass back as ?before= to fetch the next page without an offset scan
+        response.headers['X-Next-Cursor'] = format_cursor(sections[-1]["created_at"], sections[-1]["uuid"])
+    return response, 200
 
 @app.route('/api/v1/sections/<section_id>', methods=['GET'])
 @login_required
 def get_section_endpoint(section_id):
     """Get a section by ID"""
-    try:
-        section = get_section_by_id(section_id)
-        if not section:
-            return jsonify({"error": "Section not found"}), 404
-        return jsonify(section), 200
-    except Exception as e:
-        logger.error(f"Error getting section: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    section = get_section_by_id(section_id)
+    if not section:
+        return jsonify({"error": "Section not found"}), 404
+    return jsonify(section), 200
 
 @app.route('/api/v1/sections/<section_id>', methods=['PUT'])
 @login_required
 def update_section_endpoint(section_id):
     """Update a section"""
-    try:
-        body = request.json
-        section = Section(**body)
-        success = update_section(section_id, section)
-        if not success:
-            return jsonify({"error": "Section not found"}), 404
-        return jsonify({"status": "success"}), 200
-    except Exception as e:
-        logger.error(f"Error updating section: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    body = request.json
+    section = Section(**body)
+    success = update_section(section_id, section)
+    if not success:
+        return jsonify({"error": "Section not found"}), 404
+    return jsonify({"status": "success"}), 200
 
 @app.route('/api/v1/sections/<section_id>', methods=['DELETE'])
 @login_required
 def delete_section_endpoint(section_id):
     """Delete a section"""
-    try:
-        success = delete_section(section_id)
-        if not success:
-            return jsonify({"error": "Section not found"}), 404
-        return jsonify({"status": "success"}), 200
-    except Exception as e:
-        logger.error(f"Error deleting section: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    success = delete_section(section_id)
+    if not success:
+        return jsonify({"error": "Section not found"}), 404
+    return jsonify({"status": "success"}), 200
 
 @app.route('/api/v1/sections/search', methods=['GET'])
 @login_required
 def search_sections_endpoint():
     """Search sections by content"""
-    try:
-        query = request.args.get('query', '')
-        limit = int(request.args.get('limit', 10))
-        sections = search_sections(query, limit)
-        return jsonify(sections), 200
-    except Exception as e:
-        logger.error(f"Error searching sections: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    query = request.args.get('query', '')
+    limit, _ = pagination()
+    sections = search_sections(query, limit)
+    return jsonify(sections), 200
 
 # manage documents 
 
@@ -273,303 +327,202 @@ def search_sections_endpoint():
 @login_required
 def get_documents_endpoint():
     """Get all documents"""
-    try:
-        limit = int(request.args.get('limit', 10))
-        offset = int(request.args.get('offset', 0))
-        
-        documents, total_count = get_documents(limit, offset)
-        
-        # Calculate pagination info
-        page_number = (offset // limit) + 1 if limit > 0 else 1
-        total_pages = (total_count + limit - 1) // limit if limit > 0 else 1
-        
-        response = jsonify(documents)
-        response.headers['X-Total-Count'] = str(total_count)
-        response.headers['X-Page-Size'] = str(limit)
-        response.headers['X-Page-Number'] = str(page_number)
-        response.headers['X-Total-Pages'] = str(total_pages)
-        return response, 200
-    except Exception as e:
-        logger.error(f"Error getting documents: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    limit, offset = pagination()
+    
+    documents, total_count = get_documents(limit, offset)
+    
+    response = json_array_response(documents)
+    set_pagination_headers(response, total_count, limit, offset)
+    return response, 200
 
 @app.route('/api/v1/documents/<document_id>', methods=['GET'])
 @login_required
 def get_document_endpoint(document_id):
     """Get a document by ID"""
-    try:
-        document = get_document_by_id(document_id) 
-        return jsonify(document), 200
-    except Exception as e:
-        logger.error(f"Error getting document: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    document = get_document_by_id(document_id) 
+    return cached_json_response(document)
 
 @app.route('/api/v1/documents', methods=['POST'])
 @login_required
 def create_document_endpoint():
     """Create a new document"""
-    try:
-        body = request.json
-        document = Document(**body) 
-        document.author = g.user_id
-        document = create_document(document)
-        return jsonify(document), 201
-    except Exception as e:
-        logger.error(f"Error creating document: {str(e)}")
-        return jsonify({"error": str(e)}), 500
-    
+    body = request.json
+    document = Document(**body) 
+    document.author = g.user_id
+    document = create_document(document)
+    return jsonify(document), 201
 @app.route('/api/v1/documents/<document_id>', methods=['PUT'])
 @login_required
 def update_document_endpoint(document_id):
     """Update a document"""
-    try:
-        body = request.json
-        document = Document(**body)
-        document.author = g.user_id
-        document = update_document(document_id, document)
-        return jsonify(document), 200
-    except Exception as e:
-        logger.error(f"Error updating document: {str(e)}")
-        return jsonify({"error": str(e)}), 500
-    
+    body = request.json
+    document = Document(**body)
+    document.author = g.user_id
+    document = update_document(document_id, document)
+    return jsonify(document), 200
 @app.route('/api/v1/documents/<document_id>', methods=['DELETE'])
 @login_required
 def delete_document_endpoint(document_id):
     """Delete a document"""
-    try:
-        success = delete_document(document_id)
-        if not success:
-            return jsonify({"error": "Document not found"}), 404
-        return jsonify({"status": "success"}), 200
-    except Exception as e:
-        logger.error(f"Error deleting document: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    success = delete_document(document_id)
+    if not success:
+        return jsonify({"error": "Document not found"}), 404
+    return jsonify({"status": "success"}), 200
 
 # manage files
 @app.route('/api/v1/files', methods=['GET'])
 @login_required
 def get_files_endpoint():
     """Get all files"""
-    try:
-        limit = int(request.args.get('limit', 10))
-        offset = int(request.args.get('offset', 0))
-        files, total_count = get_files(limit, offset)
-        
-        # Calculate pagination info
-        page_number = (offset // limit) + 1 if limit > 0 else 1
-        total_pages = (total_count + limit - 1) // limit if limit > 0 else 1
-        
-        response = jsonify(files)
-        response.headers['X-Total-Count'] = str(total_count)
-        response.headers['X-Page-Size'] = str(limit)
-        response.headers['X-Page-Number'] = str(page_number)
-        response.headers['X-Total-Pages'] = str(total_pages)
-        return response, 200
-    except Exception as e:
-        logger.error(f"Error getting files: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    limit, offset = pagination()
+    files, total_count = get_files(limit, offset)
     
+    response = json_array_response(files)
+    set_pagination_headers(response, total_count, limit, offset)
+    return response, 200
 @app.route('/api/v1/files/<file_id>', methods=['GET'])
 @login_required
 def get_file_endpoint(file_id):
     """Get a file by ID"""
-    try:
-        file = get_file_by_id(file_id)
-        return jsonify(file), 200
-    except Exception as e:
-        logger.error(f"Error getting file: {str(e)}")
-        return jsonify({"error": str(e)}), 500
-    
+    file = get_file_by_id(file_id)
+    return jsonify(file), 200
 @app.route('/api/v1/files/<file_id>', methods=['PUT'])
 @login_required
 def update_file_endpoint(file_id):
     """Update a file"""
-    try:
-        body = request.json
-        file = File(**body)
-        file.author = g.user_id
-        file = update_file(file_id, file)
-        return jsonify(file), 200
-    except Exception as e:
-        logger.error(f"Error updating file: {str(e)}")
-        return jsonify({"error": str(e)}), 500
-    
+    body = request.json
+    file = File(**body)
+    file.author = g.user_id
+    file = update_file(file_id, file)
+    return jsonify(file), 200
 @app.route('/api/v1/files/<file_id>', methods=['DELETE'])
 @login_required
 def delete_file_endpoint(file_id):
     """Delete a file"""
-    try:
-        success = delete_file(file_id)
-        if not success:
-            return jsonify({"error": "File not found"}), 404
-        return jsonify({"status": "success"}), 200
-    except Exception as e:
-        logger.error(f"Error deleting file: {str(e)}")
-        return jsonify({"error": str(e)}), 500
-    
+    success = delete_file(file_id)
+    if not success:
+        return jsonify({"error": "File not found"}), 404
+    return jsonify({"status": "success"}), 200
 
 # Meta Agent endpoints ================================
 @app.route('/api/v1/meta-agent/chat', methods=['POST'])
 @login_required
 def meta_agent_chat_endpoint():
     """Chat with the meta agent"""
-    try:
-        body = request.json
-        messages = [Message(**msg) for msg in body.get('messages', [])]
-        language = body.get('language', Language.EN)
-        options = body.get('options', {})
-        
-        response = generate_meta_agent_response(
-            messages=messages,
-            language=language,
-            options=options
-        )
-        
-        return jsonify({"response": response}), 200
-    except Exception as e:
-        logger.error(f"Error in meta agent chat: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    body = request.json
+    messages = parse_messages(body.get('messages', []))
+    language = body.get('language', Language.EN)
+    options = body.get('options', {})
+    
+    response = generate_meta_agent_response(
+        messages=messages,
+        language=language,
+        options=options
+    )
+    
+    return jsonify({"response": response}), 200
 
 @app.route('/api/v1/agents', methods=['POST'])
 @login_required
 def create_agent_endpoint():
     """Create a new agent"""
-    try:
-        body = request.json
-        name = body.get('name')
-        description = body.get('description')
-        system_prompt = body.get('system_prompt')
-        tools = body.get('tools', [])
-        model = body.get('model', 'gpt-4o-mini')
-        temperature = body.get('temperature', 0)
-        
-        result = create_agent(
-            name=name,
-            description=description,
-            system_prompt=system_prompt,
-            tools=tools,
-            model=model,
-            temperature=temperature,
-            author=g.user_id
-        )
-        
-        return jsonify(result), 201
-    except Exception as e:
-        logger.error(f"Error creating agent: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    body = request.json
+    name = body.get('name')
+    description = body.get('description')
+    system_prompt = body.get('system_prompt')
+    tools = body.get('tools', [])
+    model = body.get('model', 'gpt-4o-mini')
+    temperature = body.get('temperature', 0)
+    
+    result = create_agent(
+        name=name,
+        description=description,
+        system_prompt=system_prompt,
+        tools=tools,
+        model=model,
+        temperature=temperature,
+        author=g.user_id
+    )
+    
+    return jsonify(result), 201
 
 @app.route('/api/v1/agents', methods=['GET'])
 @login_required
 def list_agents_endpoint():
     """List all agents for the current user"""
-    try:
-        limit = int(request.args.get('limit', 10))
-        agents = list_agents(author=g.user_id, limit=limit)
-        return jsonify(agents), 200
-    except Exception as e:
-        logger.error(f"Error listing agents: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    limit, _ = pagination()
+    agents = list_agents(author=g.user_id, limit=limit)
+    return jsonify(agents), 200
 
 @app.route('/api/v1/agents/<agent_id>', methods=['GET'])
 @login_required
 def get_agent_endpoint(agent_id):
     """Get a specific agent"""
-    try:
-        agent = get_agent(agent_id)
-        if "error" in agent:
-            return jsonify(agent), 404
-        return jsonify(agent), 200
-    except Exception as e:
-        logger.error(f"Error getting agent: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    agent = get_agent(agent_id)
+    if "error" in agent:
+        return jsonify(agent), 404
+    return jsonify(agent), 200
 
 @app.route('/api/v1/agents/<agent_id>', methods=['PUT'])
 @login_required
 def update_agent_endpoint(agent_id):
     """Update an agent"""
-    try:
-        body = request.json
-        result = update_agent(agent_id, **body)
-        return jsonify(result), 200
-    except Exception as e:
-        logger.error(f"Error updating agent: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    body = request.json
+    result = update_agent(agent_id, **body)
+    return jsonify(result), 200
 
 @app.route('/api/v1/agents/<agent_id>', methods=['DELETE'])
 @login_required
 def delete_agent_endpoint(agent_id):
     """Delete an agent"""
-    try:
-        result = delete_agent(agent_id)
-        return jsonify(result), 200
-    except Exception as e:
-        logger.error(f"Error deleting agent: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    result = delete_agent(agent_id)
+    return jsonify(result), 200
 
 @app.route('/api/v1/agents/search', methods=['GET'])
 @login_required
 def search_agents_endpoint():
     """Search for agents"""
-    try:
-        query = request.args.get('query', '')
-        limit = int(request.args.get('limit', 5))
-        agents = search_agents(query=query, limit=limit)
-        return jsonify(agents), 200
-    except Exception as e:
-        logger.error(f"Error searching agents: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    query = request.args.get('query', '')
+    limit, _ = pagination(default_limit=5)
+    agents = search_agents(query=query, limit=limit)
+    return jsonify(agents), 200
 
 @app.route('/api/v1/agents/<agent_id>/code', methods=['GET'])
 @login_required
 def generate_agent_code_endpoint(agent_id):
     """Generate Python code for an agent"""
-    try:
-        agent_config = get_agent(agent_id)
-        if "error" in agent_config:
-            return jsonify(agent_config), 404
-        
-        code = generate_agent_code(agent_config)
-        return jsonify({"code": code}), 200
-    except Exception as e:
-        logger.error(f"Error generating agent code: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    agent_config = get_agent(agent_id)
+    if "error" in agent_config:
+        return jsonify(agent_config), 404
+    
+    code = generate_agent_code(agent_config)
+    return jsonify({"code": code}), 200
 
 @app.route('/api/v1/agents/<agent_id>/test', methods=['POST'])
 @login_required
 def test_agent_endpoint(agent_id):
     """Test an agent with sample input"""
-    try:
-        body = request.json
-        test_input = body.get('test_input', 'Hello, how can you help me?')
-        
-        result = test_agent(agent_id=agent_id, test_input=test_input)
-        return jsonify(result), 200
-    except Exception as e:
-        logger.error(f"Error testing agent: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    body = request.json
+    test_input = body.get('test_input', 'Hello, how can you help me?')
+    
+    result = test_agent(agent_id=agent_id, test_input=test_input)
+    return jsonify(result), 200
 # ================================
 @app.route('/api/v1/logout', methods=['POST'])
 @login_required
 def logout_endpoint():
     """Logout"""
-    try:
-        # Get the token from the Authorization header
-        auth_header = request.headers.get('Authorization')
-        token = auth_header.split(" ")[1]
-        
-        # Blacklist the token
-        success = blacklist_token(token, g.user_id)
-        
-        if not success:
-            return jsonify({"error": "Failed to logout"}), 500
-            
-        return jsonify({"status": "success", "message": "Successfully logged out"}), 200
+    # Blacklist the token login_required already verified
+    success = blacklist_token(g.token, g.user_id)
+    
+    if not success:
+        return jsonify({"error": "Failed to logout"}), 500
         
-    except Exception as e:
-        logger.error(f"Error logging out: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    return jsonify({"status": "success", "message": "Successfully logged out"}), 200
+    
 
 if __name__ == '__main__':
-    with weaviate_connection():
-        initialize_schema()
-        app.run(debug=False, port=3001) 
+    # Turn SIGTERM into a normal exit so the atexit hook still closes the Weaviate client
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    initialize_schema()
+    app.run(debug=False, port=3001) 
@@ -1,10 +1,17 @@
-from typing import List, Dict, Any, Generator
-import json
-from libs.weaviate_lib import search_documents, insert_to_collection_in_batch, search_non_vector_collection
-from data_classes.common_classes import AskRequest, Message
-from agents.buddha_agent import generate_answer
+from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+from libs.weaviate_lib import search_documents, insert_to_collection_in_batch
+from data_classes.common_classes import AskRequest, Message, ContextBatch
+from agents.buddha_agent import generate_answer, coalesce_stream
+from libs import query_cache
 from datetime import datetime, timedelta
-from flask import Response, stream_with_context
+from flask import Response, jsonify, stream_with_context
+
+logger = logging.getLogger(__name__)
+
+# Messages are written off the request path so the client never waits on the insert
+_persist_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="persist-messages")
 
 class AskError(Exception):
     def __init__(self, message: str, status_code: int = 400):
@@ -20,34 +27,28 @@ def validate_ask(body: AskRequest) -> List[str]:
         errors.append("session_id is required")
     return errors
 
-def prepare_ask(body: AskRequest) -> tuple[Message, List[Dict[str, str]]]:
+def prepare_ask(body: AskRequest) -> tuple[Message, ContextBatch]:
     errors = validate_ask(body)
     if errors:
         raise AskError(", ".join(errors), 400)
-    user_messages = [msg for msg in body.messages if msg.role == "user"]
-    last_user_message = user_messages[-1] if user_messages else None
+    # Scan from the end; the latest user message is almost always the last one
+    last_user_message = next((msg for msg in reversed(body.messages) if msg.role == "user"), None)
 
     if not last_user_message:
         raise AskError("No user message found", 400)
 
     # Search for relevant documents
-    relevant_docs = search_documents(last_user_message.content)
-    print("relevant_docs")
-    print(relevant_docs)
-    print("--------------------------------")
+    relevant_docs = query_cache.cached_search(search_documents, last_user_message.content)
+    logger.debug("Retrieved %d documents", len(relevant_docs))
     
-    contexts = [
-        {
-            "title": doc["title"],
-            "content": doc["content"],
-            "description": doc["description"]
-        }
-        for doc in relevant_docs
-    ]
+    contexts = ContextBatch.from_documents(relevant_docs)
     return last_user_message, contexts
 
 def handle_insert_messages(body: AskRequest, last_user_message: Message, answer: str):
+    # Format both timestamps from one clock read; isoformat skips strftime's format parsing
     user_time = datetime.now()
+    user_created_at = user_time.isoformat(timespec="seconds") + "Z"
+    assistant_created_at = (user_time + timedelta(milliseconds=100)).isoformat(timespec="seconds") + "Z"
     # Insert messages to the database
     insert_to_collection_in_batch(
         collection_name="Messages",
@@ -55,16 +56,26 @@ def handle_insert_messages(body: AskRequest, last_user_message: Message, answer:
             "session_id": body.session_id,
             "content": last_user_message.content,
             "role": last_user_message.role,
-            "created_at": user_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+            "created_at": user_created_at
         },
         {
             "session_id": body.session_id,
             "content": answer,
             "role": "assistant",
-            "created_at": (user_time + timedelta(milliseconds=100)).strftime("%Y-%m-%dT%H:%M:%SZ")
+            "created_at": assistant_created_at
         }]
     )
     
+def _insert_messages_logged(body: AskRequest, last_user_message: Message, answer: str):
+    try:
+        handle_insert_messages(body, last_user_message, answer)
+    except Exception:
+        logger.exception("Failed to save messages for session %s", body.session_id)
+
+def persist_messages(body: AskRequest, last_user_message: Message, answer: str) -> Future:
+    """Save the question and answer in the background; failures are logged, not raised."""
+    return _persist_pool.submit(_insert_messages_logged, body, last_user_message, answer)
+
 def handle_ask_non_streaming(body: AskRequest) -> str:
     try:
         # 1. prepare
@@ -72,14 +83,34 @@ def handle_ask_non_streaming(body: AskRequest) -> str:
         # 2. generate answer
         answer = generate_answer(body.messages, contexts, body.options, body.language, body.model)
         # 3. save messages
-        handle_insert_messages(body, last_user_message, answer)
+        persist_messages(body, last_user_message, answer)
         return answer
     except AskError:
         raise
     except Exception as e:
         raise AskError(str(e), 500)
 
-def handle_ask_streaming(body: AskRequest) -> Response:
+# Final event of every answer stream
+SSE_DONE = "data: [DONE]\n\n"
+
+def sse_event(data: str) -> str:
+    """Frame text as one server-sent event; each line of it becomes its own data field."""
+    return "".join(f"data: {line}\n" for line in data.split("\n")) + "\n"
+
+def _error_response(message: str, status_code: int) -> Response:
+    # Serialized by the app's JSON provider, same as every other error body
+    response = jsonify({"error": message})
+    response.status_code = status_code
+    return response
+
+def handle_ask_streaming(body: AskRequest, sse: bool = False) -> Response:
+    """
+    Stream the answer as it is generated.
+
+    By default the body is the raw answer text, chunk after chunk. With sse
+    set (the client sent Accept: text/event-stream), each chunk is framed as
+    a server-sent event and the stream ends with SSE_DONE.
+    """
     try:
         # 1. prepare
         last_user_message, contexts = prepare_ask(body)
@@ -87,32 +118,15 @@ def handle_ask_streaming(body: AskRequest) -> Response:
         def generate():
             try:
                 stream = generate_answer(body.messages, contexts, body.options, body.language, body.model)
-                full_response = ""
+                parts = []
                 
-                for chunk in stream:
-                    if chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        full_response += content
-                        yield content
+                for content in coalesce_stream(stream):
+                    parts.append(content)
+                    yield sse_event(content) if sse else content
                 
-                # After streaming is complete, save the messages
-                user_time = datetime.now()
-                insert_to_collection_in_batch(
-                    collection_name="Messages",
-                    properties=[{
-                        "session_id": body.session_id,
-                        "content": last_user_message.content,
-                        "role": last_user_message.role,
-                        "created_at": user_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-                    },
-                    {
-                        "session_id": body.session_id,
-                        "content": full_response,
-                        "role": "assistant",
-                        "created_at": (user_time + timedelta(milliseconds=100)).strftime("%Y-%m-%dT%H:%M:%SZ")
-                    }]
-                )
-                yield ""
+                # After streaming is complete, save the messages without holding the stream open
+                persist_messages(body, last_user_message, "".join(parts))
+                yield SSE_DONE if sse else ""
             except Exception as e:
                 raise AskError(str(e), 500)
 
@@ -121,14 +135,6 @@ def handle_ask_streaming(body: AskRequest) -> Response:
             content_type='text/event-stream'
         )
     except AskError as e:
-        return Response(
-            response=json.dumps({"error": e.message}),
-            status=e.status_code,
-            mimetype="application/json"
-        )
+        return _error_response(e.message, e.status_code)
     except Exception as e:
-        return Response(
-            response=json.dumps({"error": str(e)}),
-            status=500,
-            mimetype="application/json"
-        )
+        return _error_response(str(e), 500)
@@ -1,16 +1,42 @@
+import hashlib
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, UTC
-from typing import Optional, Dict, Any
+from threading import Lock
+from typing import Optional, Dict, Any, Tuple
 import jwt
 from werkzeug.security import generate_password_hash, check_password_hash
 from data_classes.common_classes import User, AuthRequest
-from libs.weaviate_lib import search_non_vector_collection, insert_to_collection, COLLECTION_TOKEN_BLACKLIST
+from libs.weaviate_lib import search_non_vector_collection, insert_to_collection, delete_collection_objects_many, COLLECTION_TOKEN_BLACKLIST
 from weaviate.collections.classes.filters import Filter
 import os
 
+logger = logging.getLogger(__name__)
+
 # JWT Configuration
 JWT_SECRET = os.getenv('JWT_SECRET', 'your-secret-key')  # In production, use a secure secret
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION = timedelta(days=1)  # Token expires in 1 day
+# Decoder built once with the claims every token we issue carries
+_jwt_decoder = jwt.PyJWT(options={"require": ["exp", "iat", "user_id"]})
+# Seconds a decoded payload is reused before the signature is checked again
+VERIFY_CACHE_TTL = float(os.getenv("JWT_CACHE_TTL", "30"))
+VERIFY_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+# Decoded payloads keyed by token hash, with the time they stop being reused.
+# Only the signature and expiry checks are cached; revocation lives in the
+# shared blacklist collection and is checked on every request.
+_decoded_tokens: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_decoded_tokens_lock = Lock()
+# Explicit hash cost, so it doesn't drift with the werkzeug version; stored hashes
+# carry their own method, so changing this only affects new passwords
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+# Compared against when the email is unknown, so sign-in always pays for one hash check
+_DUMMY_PASSWORD_HASH = generate_password_hash("not-a-real-password", method=PASSWORD_HASH_METHOD)
+# Password hashing runs in hashlib, which releases the GIL, so it can overlap Weaviate calls
+_hash_pool = ThreadPoolExecutor(max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "4")), thread_name_prefix="password-hash")
 
 class AuthError(Exception):
     def __init__(self, message: str, status_code: int = 401):
@@ -20,45 +46,92 @@ class AuthError(Exception):
 
 def create_jwt_token(user_id: str) -> str:
     """Create a JWT token for a user"""
-    print('user_id:')
-    print(user_id)
+    now = datetime.now(UTC)
     payload = {
         'user_id': user_id,
-        'exp': datetime.now(UTC) + JWT_EXPIRATION,
-        'iat': datetime.now(UTC)
+        'exp': now + JWT_EXPIRATION,
+        'iat': now,
+        # Short random id; the blacklist stores a digest of it instead of the whole token
+        'jti': secrets.token_urlsafe(16)
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def verify_jwt_token(token: str) -> Dict[str, Any]:
-    """Verify a JWT token and return the payload"""
+def _decode_jwt_token(token: str) -> Dict[str, Any]:
+    """Check a JWT token's signature, expiry and required claims and return the payload"""
     try:
-        # First check if token is blacklisted
-        if is_token_blacklisted(token):
-            raise AuthError("Token has been revoked", 401)
-            
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
+        return _jwt_decoder.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except jwt.ExpiredSignatureError:
         raise AuthError("Token has expired", 401)
     except jwt.InvalidTokenError:
         raise AuthError("Invalid token", 401)
 
+def _check_not_revoked(token: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    if is_token_blacklisted(token, payload.get('jti')):
+        raise AuthError("Token has been revoked", 401)
+    return payload
+
+def verify_jwt_token(token: str) -> Dict[str, Any]:
+    """Verify a JWT token and return the payload"""
+    # Only validly signed, unexpired tokens cost a blacklist lookup
+    return _check_not_revoked(token, _decode_jwt_token(token))
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+def _jti_hash(jti: str) -> str:
+    return hashlib.blake2b(jti.encode("utf-8"), digest_size=16).hexdigest()
+
+def verify_jwt_token_cached(token: str) -> Dict[str, Any]:
+    """
+    Verify a JWT token, reusing its decoded payload for up to VERIFY_CACHE_TTL seconds.
+
+    Skips the signature check for tokens decoded recently. The blacklist is
+    still checked on every call, so a token revoked by any worker is rejected
+    on its next request. Failures are never cached, and entries never outlive
+    the token's own expiry.
+    """
+    key = _token_key(token)
+    now = time.time()
+    payload = None
+    with _decoded_tokens_lock:
+        entry = _decoded_tokens.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _decoded_tokens.move_to_end(key)
+                payload = entry[1]
+            else:
+                del _decoded_tokens[key]
+
+    if payload is None:
+        payload = _decode_jwt_token(token)
+        reuse_until = min(now + VERIFY_CACHE_TTL, payload.get("exp", now))
+        with _decoded_tokens_lock:
+            _decoded_tokens[key] = (reuse_until, payload)
+            if len(_decoded_tokens) > VERIFY_CACHE_SIZE:
+                _decoded_tokens.popitem(last=False)
+    return _check_not_revoked(token, payload)
+
 def blacklist_token(token: str, user_id: str) -> bool:
     """Add a token to the blacklist"""
     try:
         # Decode token to get expiration time
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = _jwt_decoder.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         exp_timestamp = payload.get('exp')
         
         # Convert timestamp to datetime
         exp_datetime = datetime.fromtimestamp(exp_timestamp, UTC)
         
         token_data = {
-            "token": token,
             "user_id": user_id,
             "blacklisted_at": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
             "expires_at": exp_datetime.strftime("%Y-%m-%dT%H:%M:%SZ")
         }
+        # Tokens issued before jti was added are still stored whole
+        jti = payload.get('jti')
+        if jti:
+            token_data["jti_hash"] = _jti_hash(jti)
+        else:
+            token_data["token"] = token
         
         # Insert into blacklist collection
         blacklist_id = insert_to_collection(
@@ -67,34 +140,39 @@ def blacklist_token(token: str, user_id: str) -> bool:
         )
         
         return blacklist_id is not None
-    except Exception as e:
-        print(f"Error blacklisting token: {str(e)}")
+    except Exception:
+        logger.exception("Error blacklisting token")
         return False
 
-def is_token_blacklisted(token: str) -> bool:
-    """Check if a token is blacklisted"""
+def is_token_blacklisted(token: str, jti: Optional[str] = None) -> bool:
+    """Check if a token is blacklisted, by its jti digest when it has one"""
     try:
-        filters = Filter.by_property("token").equal(token)
+        if jti:
+            filters = Filter.by_property("jti_hash").equal(_jti_hash(jti))
+        else:
+            filters = Filter.by_property("token").equal(token)
         blacklisted_tokens = search_non_vector_collection(
             collection_name=COLLECTION_TOKEN_BLACKLIST,
             filters=filters,
             limit=1,
-            properties=["token", "blacklisted_at", "expires_at"]
+            properties=["blacklisted_at", "expires_at"]
         )
         
         return len(blacklisted_tokens) > 0
-    except Exception as e:
-        print(f"Error checking token blacklist: {str(e)}")
+    except Exception:
+        logger.exception("Error checking token blacklist")
         return False
 
 def cleanup_expired_blacklisted_tokens():
     """Clean up expired tokens from blacklist"""
     try:
-        # This would require a more sophisticated cleanup mechanism
-        # For now, we'll rely on the token expiration check in verify_jwt_token
-        pass
-    except Exception as e:
-        print(f"Error cleaning up expired tokens: {str(e)}")
+        # Expired tokens are already rejected when decoded, so their entries only grow the index
+        delete_collection_objects_many(
+            collection_name=COLLECTION_TOKEN_BLACKLIST,
+            filters=Filter.by_property("expires_at").less_than(datetime.now(UTC))
+        )
+    except Exception:
+        logger.exception("Error cleaning up expired tokens")
 
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Get a user by email"""
@@ -110,17 +188,23 @@ def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
 
 def sign_up(auth_request: AuthRequest) -> Dict[str, Any]:
     """Register a new user"""
+    # Hash the password while the existence check is in flight; the happy path needs both
+    password_hash = _hash_pool.submit(generate_password_hash, auth_request.password, PASSWORD_HASH_METHOD)
+
     # Check if user already exists
     existing_user = get_user_by_email(auth_request.email)
     if existing_user:
+        password_hash.cancel()
         raise AuthError("Email already registered", 400)
 
-    # Create new user
+    # Create new user; both timestamps come from one clock read, formatted once
+    now = datetime.now(UTC)
+    now_str = now.strftime("%Y-%m-%dT%H:%M:%SZ")
     user = User(
         email=auth_request.email,
-        password=generate_password_hash(auth_request.password),
-        created_at=datetime.now(UTC),
-        updated_at=datetime.now(UTC),
+        password=password_hash.result(),
+        created_at=now,
+        updated_at=now,
         name=auth_request.name
     )
 
@@ -129,8 +213,8 @@ def sign_up(auth_request: AuthRequest) -> Dict[str, Any]:
         "email": user.email,
         "password": user.password,
         "name": user.name,
-        "created_at": user.created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
-        "updated_at": user.updated_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+        "created_at": now_str,
+        "updated_at": now_str
     }
     
     # Insert and get the UUID
@@ -157,11 +241,12 @@ def sign_in(auth_request: AuthRequest) -> Dict[str, Any]:
     """Authenticate a user and return a token"""
     # Get user from database
     user = get_user_by_email(auth_request.email)
-    if not user:
-        raise AuthError("Invalid email or password", 401)
 
-    # Verify password
-    if not check_password_hash(user["password"], auth_request.password):
+    # Verify password; unknown emails are checked against a dummy hash so both
+    # failures take the same time and don't reveal which accounts exist
+    stored_hash = user["password"] if user else _DUMMY_PASSWORD_HASH
+    password_ok = check_password_hash(stored_hash, auth_request.password)
+    if not user or not password_ok:
         raise AuthError("Invalid email or password", 401)
 
     # Generate token
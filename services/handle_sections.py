@@ -1,11 +1,13 @@
 import uuid
-from typing import List, Dict, Any
+import logging
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from data_classes.common_classes import Section, Message
 from libs.weaviate_lib import (
     COLLECTION_SECTIONS,
     insert_to_collection,
     search_non_vector_collection,
+    search_non_vector_collection_with_count,
     search_vector_collection,
     update_collection_object,
     delete_collection_object,
@@ -15,7 +17,16 @@ from weaviate.collections.classes.filters import Filter
 from weaviate.collections.classes.grpc import Sort
 from agents.sumary_agent import generate_summary
 
-def create_section(section: Section) -> Section:
+logger = logging.getLogger(__name__)
+
+SECTION_PROPERTIES = ["title", "order", "created_at", "updated_at"]
+# Newest first; the uuid orders sections that share a created_at
+_SECTION_ORDER = Sort.by_property("created_at", ascending=False).by_id(ascending=False)
+# Most sections sharing the cursor's created_at that one page looks through;
+# only rows stored with second-precision timestamps are likely to share one
+SECTION_TIE_LIMIT = 1000
+
+def create_section(section: Section) -> Dict[str, Any]:
     """Create a new section
     order: The order of the section
     title: The title of the section
@@ -24,9 +35,9 @@ def create_section(section: Section) -> Section:
     Args:
         section: Section object
     Returns:
-        Section: The created section
+        Dict[str, Any]: The created section
     """
-    now = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+    now = datetime.now().isoformat(timespec="microseconds") + "Z"
     if not section.title:
         messages = [Message(**msg) for msg in section.messages]
         section.title = generate_summary(messages, section.language)
@@ -41,53 +52,107 @@ def create_section(section: Section) -> Section:
         "updated_at": now,
         "author": section.author
     }
-    uuid =  insert_to_collection(COLLECTION_SECTIONS, properties, section.uuid)
-    return get_section_by_id(uuid)
+    inserted_id = insert_to_collection(COLLECTION_SECTIONS, properties, section.uuid)
+    # Every stored property is already known; answer without reading the object back
+    return {
+        "uuid": str(inserted_id),
+        "title": section.title,
+        "order": section.order,
+        "created_at": now,
+        "updated_at": now,
+        "author": section.author
+    }
 
-def get_sections(email: str, limit: int = 10, offset: int = 0) -> tuple[List[Dict[str, Any]], int]:
-    """Get all sections with pagination and total count"""
-    filters = Filter.by_property("author").equal(email)
-    
-    # Get sections data
-    sections = search_non_vector_collection(
-        collection_name=COLLECTION_SECTIONS,
-        limit=limit,
-        offset=offset,
-        properties=["title", "order", "created_at", "updated_at"],
-        sort=Sort.by_property("created_at", ascending=False),
-        filters=filters
-    )
-    
-    # Get total count
-    total_count = get_collection_count(
+def get_sections(
+    email: str,
+    limit: int = 10,
+    offset: int = 0,
+    before: Optional[datetime] = None,
+    before_id: Optional[uuid.UUID] = None
+) -> tuple[List[Dict[str, Any]], int]:
+    """
+    Get all sections with pagination and total count, newest first.
+
+    Sections are ordered by created_at, then by uuid, both descending. Pass
+    before and before_id (the created_at and uuid of the last section
+    already seen) to page by key instead of offset; Weaviate then starts
+    from the cursor rather than skipping offset objects. The uuid breaks
+    ties between sections stored with second-precision timestamps, so none
+    are skipped at a page boundary.
+    """
+    author_filter = Filter.by_property("author").equal(email)
+    if before is None:
+        return search_non_vector_collection_with_count(
+            collection_name=COLLECTION_SECTIONS,
+            limit=limit,
+            offset=offset,
+            properties=SECTION_PROPERTIES,
+            sort=_SECTION_ORDER,
+            filters=author_filter
+        )
+
+    # Weaviate can sort by id but not filter on an id range, so the rest of
+    # the cursor's own created_at group is picked out here
+    ties: List[Dict[str, Any]] = []
+    if before_id is not None:
+        group = search_non_vector_collection(
+            collection_name=COLLECTION_SECTIONS,
+            limit=SECTION_TIE_LIMIT,
+            properties=SECTION_PROPERTIES,
+            sort=Sort.by_id(ascending=False),
+            filters=author_filter & Filter.by_property("created_at").equal(before)
+        )
+        ties = [section for section in group if section["uuid"] < before_id][:limit]
+    if len(ties) == limit:
+        return ties, get_collection_count(COLLECTION_SECTIONS, author_filter)
+
+    sections, total_count = search_non_vector_collection_with_count(
         collection_name=COLLECTION_SECTIONS,
-        filters=filters
+        limit=limit - len(ties),
+        properties=SECTION_PROPERTIES,
+        sort=_SECTION_ORDER,
+        filters=author_filter & Filter.by_property("created_at").less_than(before),
+        count_filters=author_filter
     )
-    
-    return sections, total_count
+    return ties + sections, total_count
 
-def get_section_by_id(section_id: str) -> Section:
-    """Get a section by its ID"""
-    filters = Filter.by_id().equal(section_id)
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+def get_sections_by_ids(section_ids: List[str]) -> List[Dict[str, Any]]:
+    """Get several sections in one request; ids that don't exist or aren't UUIDs are skipped"""
+    section_ids = [section_id for section_id in section_ids if _is_uuid(section_id)]
+    if not section_ids:
+        return []
     sections = search_non_vector_collection(
         collection_name=COLLECTION_SECTIONS,
-        limit=1,
+        limit=len(section_ids),
         properties=["title", "order", "created_at", "updated_at"],
-        filters=filters
+        filters=Filter.by_id().contains_any(section_ids)
     )
+    return [
+        {
+            "uuid": section["uuid"],
+            "title": section.get("title"),
+            "order": section.get("order"),
+            "created_at": section.get("created_at"),
+            "updated_at": section.get("updated_at")
+        }
+        for section in sections
+    ]
 
-    section = Section(**sections[0]) if sections else None
-    return {
-        "uuid": section.uuid,
-        "title": section.title,
-        "order": section.order,
-        "created_at": section.created_at,
-        "updated_at": section.updated_at
-    }
+def get_section_by_id(section_id: str) -> Optional[Dict[str, Any]]:
+    """Get a section by its ID, or None if it doesn't exist"""
+    sections = get_sections_by_ids([section_id])
+    return sections[0] if sections else None
 
 def update_section(section_id: str, section: Section) -> bool:
     """Update a section"""
-    now = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+    now = datetime.now().isoformat(timespec="microseconds") + "Z"
     properties = {
         "title": section.title,
         "order": section.order or 0,
@@ -96,8 +161,8 @@ def update_section(section_id: str, section: Section) -> bool:
     try:
         update_collection_object(COLLECTION_SECTIONS, section_id, properties)
         return True
-    except Exception as e:
-        print(f"Error updating section: {str(e)}")
+    except Exception:
+        logger.exception("Error updating section")
         return False
 
 def delete_section(section_id: str) -> bool:
@@ -105,8 +170,8 @@ def delete_section(section_id: str) -> bool:
     try:
         delete_collection_object(COLLECTION_SECTIONS, section_id)
         return True
-    except Exception as e:
-        print(f"Error deleting section: {str(e)}")
+    except Exception:
+        logger.exception("Error deleting section")
         return False
 
 def search_sections(query: str, limit: int = 10) -> List[Dict[str, Any]]:
@@ -1,78 +1,131 @@
-from libs.pdf_lib import process_pdf, read_pdf_from_buffer, allowed_file
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
+from libs.pdf_lib import process_pdf_pages, read_pdf_pages_in_worker, allowed_file
 from werkzeug.datastructures import FileStorage
-from typing import List, Tuple, Dict, Any, Optional
-from libs.weaviate_lib import upload_documents, search_non_vector_collection, insert_to_collection, COLLECTION_DOCUMENTS, update_collection_object, delete_collection_object, COLLECTION_FILES, client, delete_collection_objects_many, get_collection_count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from libs.weaviate_lib import upload_document_contents, UPLOAD_BATCH_SIZE, search_non_vector_collection, search_non_vector_collection_with_count, insert_to_collection, COLLECTION_DOCUMENTS, update_collection_object, delete_collection_object, COLLECTION_FILES, delete_collection_objects_many
 from weaviate.collections.classes.filters import Filter
 from weaviate.collections.classes.grpc import Sort
 from datetime import datetime
 from data_classes.common_classes import Document, File
+from libs import query_cache
 
-def upload_file(files: List[FileStorage], description: str, author: str) -> Tuple[List[dict], int]:
+# Filter builders hold no per-query state, so one of each is reused
+_FILTER_BY_ID = Filter.by_id()
+_FILTER_BY_FILE_ID = Filter.by_property("file_id")
+_FILTER_BY_NAME = Filter.by_property("name")
+
+# Uploaded files ingested concurrently
+UPLOAD_PARALLELISM = int(os.getenv("UPLOAD_PARALLELISM", "4"))
+# Runs a deleted file's bulk document delete alongside the file delete itself
+_delete_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="delete-documents")
+# Seconds a file metadata lookup is reused, and number of files kept
+FILE_CACHE_TTL = float(os.getenv("FILE_CACHE_TTL", "60"))
+FILE_CACHE_SIZE = int(os.getenv("FILE_CACHE_SIZE", "4096"))
+# Files keyed by ID, with the time they stop being reused
+_files_by_id: "OrderedDict[str, Tuple[float, File]]" = OrderedDict()
+_files_lock = Lock()
+# Seconds a files/documents listing page is reused, and number of pages kept
+LISTING_CACHE_TTL = float(os.getenv("LISTING_CACHE_TTL", "30"))
+LISTING_CACHE_SIZE = int(os.getenv("LISTING_CACHE_SIZE", "1024"))
+# Listing pages keyed by (collection, version, limit, offset); a write bumps the
+# collection's version so its older pages are never read again and age out
+_listings: "OrderedDict[Tuple[str, int, int, int], Tuple[float, Any]]" = OrderedDict()
+_listing_versions: Dict[str, int] = {COLLECTION_FILES: 0, COLLECTION_DOCUMENTS: 0}
+_listings_lock = Lock()
+
+def _cached_listing(collection_name: str, limit: int, offset: int, load: Callable[[], Any]) -> Any:
+    """Return load() for this page, reusing a result from the last LISTING_CACHE_TTL seconds."""
+    now = time.monotonic()
+    with _listings_lock:
+        key = (collection_name, _listing_versions[collection_name], limit, offset)
+        entry = _listings.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _listings.move_to_end(key)
+                return entry[1]
+            del _listings[key]
+
+    result = load()
+    with _listings_lock:
+        _listings[key] = (now + LISTING_CACHE_TTL, result)
+        if len(_listings) > LISTING_CACHE_SIZE:
+            _listings.popitem(last=False)
+    return result
+
+def _invalidate_listings(*collection_names: str) -> None:
+    with _listings_lock:
+        for collection_name in collection_names:
+            _listing_versions[collection_name] += 1
+
+def _ingest_single(file: FileStorage, description: str, author: str, batch_size: int) -> Tuple[dict, int]:
+    """Chunk one uploaded PDF, register it as a file and upload its chunks. Returns the result and failed object count."""
+    # Extract page texts in a worker process, then chunk them a window at a time
+    chunks = process_pdf_pages(read_pdf_pages_in_worker(file))
+    file_id = create_file(File(
+        name=file.filename,
+        path=file.filename,
+        author=author
+    ))
+    if not file_id:
+        raise Exception("Failed to create file")
+    # upload_document_contents opens its own collection handle, so every worker gets its own batch
+    failed_objects = upload_document_contents(
+        (chunk.page_content for chunk in chunks),
+        title=file.filename,
+        file_id=file_id,
+        description=description,
+        author=author,
+        batch_size=batch_size
+    )
+    # Report counts only; the chunks themselves can be listed through the documents API
+    return {
+        "filename": file.filename,
+        "file_id": file_id,
+        "num_chunks": len(chunks),
+        "num_failed": len(failed_objects)
+    }, len(failed_objects)
+
+def upload_file(files: List[FileStorage], description: str, author: str, batch_size: int = UPLOAD_BATCH_SIZE) -> Tuple[List[dict], int]:
     if not files:
         raise Exception("No files uploaded")
 
-    results = []
     for file in files:
         if not allowed_file(file.filename):
             raise Exception(f"File type not allowed for {file.filename}. Only PDF files are accepted.")
-        # Read PDF content from buffer
-        pdf_content = read_pdf_from_buffer(file)
-        
-        # Process the PDF content
-        chunks = process_pdf(
-            text=pdf_content,
-        )
-        file_id = create_file(File(
-            name=file.filename,
-            path=file.filename,
-            author=author
-        ))
-        if not file_id:
-            raise Exception("Failed to create file")
-        # Convert chunks to a serializable format
-        serialized_chunks = [
-            {
-                "content": chunk.page_content,
-                "title": file.filename,
-                "file_id": file_id,
-                "description": description,
-                "author": author,
-            }
-            for chunk in chunks
-        ]
-        results.append({
-            "filename": file.filename,
-            "num_chunks": len(chunks),
-            "chunks": serialized_chunks
-        })
-        
-        failed_objects = upload_documents(serialized_chunks)
 
-        return results, len(failed_objects)
-    
-    return results, 0
+    # Parsing, embedding and Weaviate uploads are mostly network-bound; ingest files side by side
+    try:
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_PARALLELISM, len(files))) as executor:
+            ingested = list(executor.map(lambda file: _ingest_single(file, description, author, batch_size), files))
+    finally:
+        # New chunks change what retrieval and the listings should return
+        query_cache.clear()
+        _invalidate_listings(COLLECTION_FILES, COLLECTION_DOCUMENTS)
+
+    results = [result for result, _ in ingested]
+    return results, sum(failed for _, failed in ingested)
 
 # manage files
 def get_files(limit: int, offset: int) -> tuple[List[Dict[str, Any]], int]:
     """
     Get all files with pagination and total count
     """
-    # Get files data
-    files = search_non_vector_collection(
-        collection_name=COLLECTION_FILES,
-        limit=limit,    
-        offset=offset,
-        properties=["name", "path", "author", "created_at", "updated_at"],
-        sort=Sort.by_property("created_at", ascending=True)
-    )
-    
-    # Get total count
-    total_count = get_collection_count(
-        collection_name=COLLECTION_FILES
-    )
+    def load():
+        # Files data and total count
+        files, total_count = search_non_vector_collection_with_count(
+            collection_name=COLLECTION_FILES,
+            limit=limit,    
+            offset=offset,
+            properties=["name", "path", "author", "created_at", "updated_at"],
+            sort=Sort.by_property("created_at", ascending=True)
+        )
+        return [File(**file) for file in files], total_count
     
-    files = [File(**file) for file in files]
-    return files, total_count
+    return _cached_listing(COLLECTION_FILES, limit, offset, load)
 
 def create_file(file: File) -> str:
     """
@@ -81,7 +134,7 @@ def create_file(file: File) -> str:
     if not file.author:
         raise Exception("Author is required")
     
-    now = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+    now = datetime.now().isoformat(timespec="seconds") + "Z"
     file_id = insert_to_collection(
         collection_name=COLLECTION_FILES,
         properties={
@@ -92,6 +145,7 @@ def create_file(file: File) -> str:
             "updated_at": now
         }
     )
+    _invalidate_listings(COLLECTION_FILES)
     return file_id
 
 def get_file_by_name(name: str) -> Optional[File]:
@@ -100,7 +154,7 @@ def get_file_by_name(name: str) -> Optional[File]:
     """
     file = search_non_vector_collection(
         collection_name=COLLECTION_FILES,
-        filters=Filter.by_property("name").equal(name),
+        filters=_FILTER_BY_NAME.equal(name),
         properties=["name", "path", "author", "created_at", "updated_at"],
         limit=1
     )
@@ -110,71 +164,62 @@ def get_file_by_name(name: str) -> Optional[File]:
 
 def get_file_by_id(file_id: str) -> File:
     """
-    Get a file by its ID
+    Get a file by its ID, reusing a lookup from the last FILE_CACHE_TTL seconds
     """
+    now = time.monotonic()
+    with _files_lock:
+        entry = _files_by_id.get(file_id)
+        if entry is not None:
+            if entry[0] > now:
+                _files_by_id.move_to_end(file_id)
+                return entry[1]
+            del _files_by_id[file_id]
+
     file = search_non_vector_collection(
         collection_name=COLLECTION_FILES,
-        filters=Filter.by_id().equal(file_id),
+        filters=_FILTER_BY_ID.equal(file_id),
         properties=["name", "path", "author", "created_at", "updated_at"],
         limit=1
     )
     if not file:
         raise Exception(f"File not found for id: {file_id}")
-    return File(**file[0])
+    file = File(**file[0])
+    with _files_lock:
+        _files_by_id[file_id] = (now + FILE_CACHE_TTL, file)
+        if len(_files_by_id) > FILE_CACHE_SIZE:
+            _files_by_id.popitem(last=False)
+    return file
 
-def update_file(file_id: str, payload: File) -> File:
+def _forget_file(file_id: str) -> None:
+    with _files_lock:
+        _files_by_id.pop(file_id, None)
+
+def update_file(file_id: str, payload: File) -> Dict[str, Any]:
     """
     Update a file
-    """
-    file = get_file_by_id(file_id)
-    if not file:
-        raise Exception("File not found")
-    
-    now = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
-    if payload.name:
-        file.name = payload.name
-    if payload.path:
-        file.path = payload.path
-    if payload.author:  
-        file.author = payload.author
     
+    Only the fields set on payload are written; Weaviate merges them into the
+    stored object, so the file is not read first.
+    """
     update_file = {
-        "name": file.name,
-        "path": file.path,  
-        "author": file.author,
-        "updated_at": now
+        key: value
+        for key, value in (("name", payload.name), ("path", payload.path), ("author", payload.author))
+        if value
     }
+    update_file["updated_at"] = datetime.now().isoformat(timespec="seconds") + "Z"
     
     success = update_collection_object(
         collection_name=COLLECTION_FILES,
         uuid=file_id,
         properties=update_file
     )
+    _forget_file(file_id)
+    _invalidate_listings(COLLECTION_FILES)
     
     if not success:
         raise Exception("Failed to update file")
     
-    return update_file
-
-# def delete_file(file_id: str) -> bool:
-#     """
-#     Delete a file
-#     """
-#     # Check if file exists
-#     file = get_file_by_id(file_id)
-#     if not file:
-#         raise Exception("File not found")
-    
-#     # Delete file   
-#     success = delete_collection_object(
-#         collection_name=COLLECTION_FILES,
-#         uuid=file_id
-#     )
-    
-#     if not success:
-#         raise Exception("Failed to delete file")
-    
-#     return True
+    return {"uuid": file_id, **update_file}
 
 def delete_file_with_transaction(file_id: str) -> bool:
     """
@@ -184,34 +229,33 @@ def delete_file_with_transaction(file_id: str) -> bool:
         file_id: ID of the file to delete
         
     Returns:
-        True if deletion was successful
+        True if deletion was successful, False if no file has that ID
         
     Raises:
         Exception: If the transaction fails
     """
+    # The two deletes are independent; remove the file's documents while the file itself is deleted
+    documents_deleted = _delete_pool.submit(
+        delete_collection_objects_many,
+        collection_name=COLLECTION_DOCUMENTS,
+        filters=_FILTER_BY_FILE_ID.equal(file_id)
+    )
     try:
-        # Get the file first
-        file = get_file_by_id(file_id)
-        if not file:
-            raise Exception("File not found")
-        
-        
-        # Delete all documents associated with this file
-        delete_collection_objects_many(
-            collection_name=COLLECTION_DOCUMENTS,
-            filters=Filter.by_property("file_id").equal(file_id)
-        )
-        
-        # Delete the file
-        delete_collection_object(
+        # Delete the file; Weaviate reports a missing file here, so it is not looked up first
+        deleted = delete_collection_object(
             collection_name=COLLECTION_FILES,
             uuid=file_id
         )
-        
-        return True
-
-    except Exception as e:
-        raise Exception(f"Error in delete transaction: {str(e)}")
+        documents_deleted.result()
+    finally:
+        # Either delete may have gone through even if the other failed or found
+        # nothing; once both are done, drop cached reads either way
+        wait([documents_deleted])
+        _forget_file(file_id)
+        query_cache.clear()
+        _invalidate_listings(COLLECTION_FILES, COLLECTION_DOCUMENTS)
+    
+    return deleted
 
 # Update the existing functions to use transactions where appropriate
 def delete_file(file_id: str) -> bool:
@@ -227,24 +271,13 @@ def get_documents(limit: int, offset: int) -> tuple[List[Dict[str, Any]], int]:
     Returns:
         Tuple of (documents, total_count)
     """
-    try:
-        # Get documents data
-        documents = search_non_vector_collection(
-            collection_name=COLLECTION_DOCUMENTS,
-            limit=limit,
-            offset=offset,
-            properties=["title", "content", "description", "author", "created_at", "updated_at"],
-            sort=Sort.by_property("created_at", ascending=True)
-        )
-        
-        # Get total count
-        total_count = get_collection_count(
-            collection_name=COLLECTION_DOCUMENTS
-        )
-        
-        return documents, total_count
-    except Exception as e:
-        raise Exception(f"Error getting documents: {str(e)}")
+    return _cached_listing(COLLECTION_DOCUMENTS, limit, offset, lambda: search_non_vector_collection_with_count(
+        collection_name=COLLECTION_DOCUMENTS,
+        limit=limit,
+        offset=offset,
+        properties=["title", "content", "description", "author", "created_at", "updated_at"],
+        sort=Sort.by_property("created_at", ascending=True)
+    ))
 
 def get_document_by_id(document_id: str) -> Document:
     """
@@ -256,29 +289,26 @@ def get_document_by_id(document_id: str) -> Document:
     Returns:
         Document data if found, None otherwise
     """
-    try:
-        documents = search_non_vector_collection(
-            collection_name=COLLECTION_DOCUMENTS,
-            filters=Filter.by_id().equal(document_id),
-            limit=1,
-            properties=["title", "content", "description", "author", "created_at", "updated_at"]
-        )
-        
-        if not documents:
-            raise Exception(f"Document not found for id: {document_id}")
-        
-        document = documents[0]
-        return {
-            "uuid": document.uuid,
-            "title": document.title,
-            "content": document.content,
-            "description": document.description,
-            "author": document.author,
-            "created_at": document.created_at,
-            "updated_at": document.updated_at
-        }
-    except Exception as e:
-        raise Exception(f"Error getting document: {str(e)}")
+    documents = search_non_vector_collection(
+        collection_name=COLLECTION_DOCUMENTS,
+        filters=_FILTER_BY_ID.equal(document_id),
+        limit=1,
+        properties=["title", "content", "description", "author", "created_at", "updated_at"]
+    )
+    
+    if not documents:
+        raise Exception(f"Document not found for id: {document_id}")
+    
+    document = documents[0]
+    return {
+        "uuid": document.uuid,
+        "title": document.title,
+        "content": document.content,
+        "description": document.description,
+        "author": document.author,
+        "created_at": document.created_at,
+        "updated_at": document.updated_at
+    }
 
 def create_document(document: Document) -> Document:
     """
@@ -290,93 +320,72 @@ def create_document(document: Document) -> Document:
     Returns:
         Created document with ID
     """
-    try:
-        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
-        
-        # Prepare document properties
-        properties = {
-            "title": document.title,
-            "content": document.content,
-            "description": document.description,
-            "author": document.author,
-            "created_at": now,
-            "updated_at": now
-        }
-        
-        # Insert document and get UUID
-        document_id = insert_to_collection(
-            collection_name=COLLECTION_DOCUMENTS,
-            properties=properties
-        )
-        
-        if not document_id:
-            raise Exception("Failed to create document")
-            
-        # Set the ID and return the document
-        document.uuid = document_id
-        return document
+    now = datetime.now().isoformat(timespec="seconds") + "Z"
+    
+    # Prepare document properties
+    properties = {
+        "title": document.title,
+        "content": document.content,
+        "description": document.description,
+        "author": document.author,
+        "created_at": now,
+        "updated_at": now
+    }
+    
+    # Insert document and get UUID
+    document_id = insert_to_collection(
+        collection_name=COLLECTION_DOCUMENTS,
+        properties=properties
+    )
+    
+    if not document_id:
+        raise Exception("Failed to create document")
+    query_cache.clear()
+    _invalidate_listings(COLLECTION_DOCUMENTS)
         
-    except Exception as e:
-        raise Exception(f"Error creating document: {str(e)}")
+    # Set the ID and return the document
+    document.uuid = document_id
+    return document
 
-def update_document(document_id: str, payload: Document) -> Document:
+def update_document(document_id: str, payload: Document) -> Dict[str, Any]:
     """
     Update an existing document
     
+    Only the fields set on payload are written; Weaviate merges them into the
+    stored object, so the document is not read first.
+    
     Args:
         document_id: ID of the document to update
-        document: Updated document data
+        payload: Updated document data
         
     Returns:
-        Updated document
+        The document ID with the properties that were written
     """
-    try:
-        # Check if document exists
-        existing_docs = search_non_vector_collection(
-            collection_name=COLLECTION_DOCUMENTS,
-            filters=Filter.by_id().equal(document_id),
-            properties=["title", "content", "description", "author", "created_at", "updated_at"],
-            limit=1
+    update_document = {
+        key: value
+        for key, value in (
+            ("title", payload.title),
+            ("content", payload.content),
+            ("description", payload.description),
+            ("author", payload.author),
         )
-        new_document = Document(**existing_docs[0])
-        if not existing_docs:
-            raise Exception("Document not found")
-        
-        # Prepare update properties
-        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
-        
-        if payload.title:
-            new_document.title = payload.title
-        if payload.content:
-            new_document.content = payload.content
-        if payload.description:
-            new_document.description = payload.description
-        if payload.author:
-            new_document.author = payload.author
-        
-        update_document = {
-            "title": new_document.title,
-            "content": new_document.content,
-            "description": new_document.description,
-            "author": new_document.author,
-            "created_at": new_document.created_at if new_document.created_at else now,
-            "updated_at": now
-        }
-        
-        # Update document
-        success = update_collection_object(
-            collection_name=COLLECTION_DOCUMENTS,
-            uuid=document_id,
-            properties=update_document
-        )
-        
-        if not success:
-            raise Exception("Failed to update document")
+        if value
+    }
+    update_document["updated_at"] = datetime.now().isoformat(timespec="seconds") + "Z"
+    
+    # Update document
+    success = update_collection_object(
+        collection_name=COLLECTION_DOCUMENTS,
+        uuid=document_id,
+        properties=update_document
+    )
+    
+    if not success:
+        raise Exception("Failed to update document")
+    query_cache.clear()
+    _invalidate_listings(COLLECTION_DOCUMENTS)
 
-        return update_document
-        
-    except Exception as e:
-        raise Exception(f"Error updating document: {str(e)}")
+    return {"uuid": document_id, **update_document}
 
 def delete_document(document_id: str) -> bool:
     """
@@ -388,29 +397,15 @@ def delete_document(document_id: str) -> bool:
     Returns:
         True if deletion was successful, False if document not found
     """
-    try:
-        # Check if document exists
-        existing_docs = search_non_vector_collection(
-            collection_name=COLLECTION_DOCUMENTS,
-            filters=Filter.by_id().equal(document_id),
-            limit=1
-        )
-        
-        if not existing_docs:
-            return False
-            
-        # Delete document
-        success = delete_collection_object(
-            collection_name=COLLECTION_DOCUMENTS,
-            uuid=document_id
-        )
-        
-        if not success:
-            raise Exception("Failed to delete document")
-            
-        return True
+    # Weaviate reports a missing object on the delete itself, so there is no lookup first
+    deleted = delete_collection_object(
+        collection_name=COLLECTION_DOCUMENTS,
+        uuid=document_id
+    )
+    
+    if not deleted:
+        return False
+    query_cache.clear()
+    _invalidate_listings(COLLECTION_DOCUMENTS)
         
-    except Exception as e:
-        raise Exception(f"Error deleting document: {str(e)}")
-
-    
\ No newline at end of file
+    return True
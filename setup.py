@@ -8,7 +8,7 @@ setup(
         "flask",
         "flask-cors",
         "python-dotenv",
-        "weaviate-client",
+        "weaviate-client>=4.4",
         "openai",
         "langchain",
         "langchain-openai",
@@ -1,12 +1,21 @@
+import jwt
 import pytest
 from unittest.mock import patch, MagicMock
 from services.handle_auth import (
     create_jwt_token, 
     verify_jwt_token, 
+    verify_jwt_token_cached,
     blacklist_token, 
     is_token_blacklisted,
-    AuthError
+    sign_up,
+    sign_in,
+    AuthError,
+    JWT_SECRET,
+    JWT_ALGORITHM
 )
+from data_classes.common_classes import AuthRequest
+from services import handle_auth
+from werkzeug.security import check_password_hash
 from datetime import datetime, timedelta, UTC
 
 class TestAuth:
@@ -72,6 +81,18 @@ class TestAuth:
         
         assert result is False
     
+    @patch('services.handle_auth.insert_to_collection')
+    def test_blacklist_token_stores_jti_digest(self, mock_insert):
+        """Test that the blacklist stores a digest of the jti instead of the token"""
+        mock_insert.return_value = "blacklist_id_123"
+        token = create_jwt_token("test_user_123")
+
+        assert blacklist_token(token, "test_user_123") is True
+
+        stored = mock_insert.call_args.kwargs["properties"]
+        assert "token" not in stored
+        assert len(stored["jti_hash"]) == 32
+
     @patch('services.handle_auth.search_non_vector_collection')
     def test_is_token_blacklisted_true(self, mock_search):
         """Test checking if token is blacklisted (returns True)"""
@@ -95,10 +116,115 @@ class TestAuth:
     @patch('services.handle_auth.search_non_vector_collection')
     def test_verify_jwt_token_blacklisted(self, mock_search):
         """Test that blacklisted tokens are rejected"""
-        mock_search.return_value = [{"token": "test_token_123"}]
+        token = create_jwt_token("test_user_123")
+        mock_search.return_value = [{"token": token}]
         
         with pytest.raises(AuthError) as exc_info:
-            verify_jwt_token("test_token_123")
+            verify_jwt_token(token)
         
         assert exc_info.value.message == "Token has been revoked"
-        assert exc_info.value.status_code == 401 
\ No newline at end of file
+        assert exc_info.value.status_code == 401 
+
+    def test_verify_jwt_token_missing_claim(self):
+        """Test that a correctly signed token without user_id is rejected"""
+        token = jwt.encode(
+            {'exp': datetime.now(UTC) + timedelta(hours=1), 'iat': datetime.now(UTC)},
+            JWT_SECRET,
+            algorithm=JWT_ALGORITHM
+        )
+
+        with pytest.raises(AuthError) as exc_info:
+            verify_jwt_token(token)
+
+        assert exc_info.value.message == "Invalid token"
+
+    @patch('services.handle_auth.search_non_vector_collection')
+    def test_verify_jwt_token_invalid_skips_blacklist(self, mock_search):
+        """Test that malformed tokens are rejected without a blacklist lookup"""
+        with pytest.raises(AuthError) as exc_info:
+            verify_jwt_token("test_token_123")
+
+        assert exc_info.value.message == "Invalid token"
+        mock_search.assert_not_called()
+
+    @patch('services.handle_auth.search_non_vector_collection')
+    def test_verify_jwt_token_cached_reuses_decode(self, mock_search):
+        """Test that a recently decoded token skips the signature check but not the blacklist"""
+        mock_search.return_value = []
+        token = create_jwt_token("cached_user")
+
+        with patch('services.handle_auth._jwt_decoder.decode', wraps=handle_auth._jwt_decoder.decode) as mock_decode:
+            assert verify_jwt_token_cached(token)['user_id'] == "cached_user"
+            assert verify_jwt_token_cached(token)['user_id'] == "cached_user"
+
+        mock_decode.assert_called_once()
+        assert mock_search.call_count == 2
+
+    @patch('services.handle_auth.search_non_vector_collection')
+    def test_verify_jwt_token_cached_revoked_elsewhere(self, mock_search):
+        """Test that a token blacklisted by another worker is rejected despite the cache"""
+        mock_search.return_value = []
+        token = create_jwt_token("other_worker_user")
+        verify_jwt_token_cached(token)
+
+        # Another process wrote the blacklist entry; this process's cache was never touched
+        mock_search.return_value = [{"token": token}]
+
+        with pytest.raises(AuthError) as exc_info:
+            verify_jwt_token_cached(token)
+
+        assert exc_info.value.message == "Token has been revoked"
+
+    @patch('services.handle_auth.insert_to_collection')
+    @patch('services.handle_auth.search_non_vector_collection')
+    def test_verify_jwt_token_cached_after_blacklist(self, mock_search, mock_insert):
+        """Test that blacklisting a token drops its cached verification"""
+        mock_search.return_value = []
+        mock_insert.return_value = "blacklist_id_123"
+        token = create_jwt_token("revoked_user")
+        verify_jwt_token_cached(token)
+
+        assert blacklist_token(token, "revoked_user") is True
+        mock_search.return_value = [{"token": token}]
+
+        with pytest.raises(AuthError) as exc_info:
+            verify_jwt_token_cached(token)
+
+        assert exc_info.value.message == "Token has been revoked"
+
+    @patch('services.handle_auth.insert_to_collection')
+    @patch('services.handle_auth.search_non_vector_collection')
+    def test_sign_up_stores_password_hash(self, mock_search, mock_insert):
+        """Test that sign up stores the hash computed alongside the existence check"""
+        mock_search.return_value = []
+        mock_insert.return_value = "user_id_123"
+
+        result = sign_up(AuthRequest(email="new@example.com", password="secret", name="New"))
+
+        stored = mock_insert.call_args.kwargs["properties"]["password"]
+        assert check_password_hash(stored, "secret")
+        assert result["user"]["email"] == "new@example.com"
+
+    @patch('services.handle_auth.insert_to_collection')
+    @patch('services.handle_auth.search_non_vector_collection')
+    def test_sign_up_existing_email(self, mock_search, mock_insert):
+        """Test that an already registered email is rejected"""
+        mock_search.return_value = [{"email": "taken@example.com"}]
+
+        with pytest.raises(AuthError) as exc_info:
+            sign_up(AuthRequest(email="taken@example.com", password="secret"))
+
+        assert exc_info.value.status_code == 400
+        mock_insert.assert_not_called()
+
+    @patch('services.handle_auth.check_password_hash', return_value=False)
+    @patch('services.handle_auth.search_non_vector_collection')
+    def test_sign_in_unknown_email_checks_dummy_hash(self, mock_search, mock_check):
+        """Test that an unknown email still runs a password hash check"""
+        mock_search.return_value = []
+
+        with pytest.raises(AuthError) as exc_info:
+            sign_in(AuthRequest(email="nobody@example.com", password="secret"))
+
+        assert exc_info.value.message == "Invalid email or password"
+        mock_check.assert_called_once()
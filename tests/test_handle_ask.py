@@ -2,9 +2,10 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
 from flask import Response, Flask, stream_with_context
-from services.handle_ask import validate_ask, handle_ask_streaming, handle_ask_non_streaming, AskError
+from services.handle_ask import validate_ask, handle_ask_streaming, handle_ask_non_streaming, AskError, _insert_messages_logged, sse_event
 from data_classes.common_classes import AskRequest, Message
 from agents.buddha_agent import generate_answer
+from libs import query_cache
 import json
 
 # Test data
@@ -21,6 +22,11 @@ MOCK_DOCUMENTS = [
 
 MOCK_ANSWER = "The meaning of life is to find inner peace and wisdom."
 
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    """Keep retrieval results from leaking between tests"""
+    query_cache.clear()
+
 @pytest.fixture
 def app():
     """Create a Flask app for testing"""
@@ -75,8 +81,9 @@ def test_handle_ask_non_streaming(
     mock_generate_answer.return_value = MOCK_ANSWER
     mock_insert.return_value = ["msg-id-1", "msg-id-2"]
 
-    # Call the function
-    response = handle_ask_non_streaming(valid_ask_request)
+    # Call the function, waiting for the background save
+    with patch('services.handle_ask.persist_messages', side_effect=lambda *args: _insert_messages_logged(*args)):
+        response = handle_ask_non_streaming(valid_ask_request)
 
     # Verify the response
     assert isinstance(response, str)
@@ -124,7 +131,8 @@ def test_handle_ask_streaming(
         # Verify the response
         assert response.status_code == 200
         assert response.content_type == 'text/event-stream'
-        assert b'streaming' in response.data
+        # Without Accept: text/event-stream the body stays raw text
+        assert response.data == b'streaming '
 
     # Verify mocks were called correctly
     mock_search_documents.assert_called_once_with(VALID_MESSAGES[-1].content)
@@ -202,4 +210,35 @@ def test_handle_ask_streaming_no_user_message(mock_search_documents, app):
     assert isinstance(response, Response)
     assert response.status_code == 400
     response_data = json.loads(response.get_data())
-    assert response_data["error"] == "No user message found" 
\ No newline at end of file
+    assert response_data["error"] == "No user message found" 
+
+@patch('services.handle_ask.search_documents')
+@patch('services.handle_ask.generate_answer')
+@patch('services.handle_ask.insert_to_collection_in_batch')
+def test_handle_ask_streaming_sse(mock_insert, mock_generate_answer, mock_search_documents, app):
+    """Test that clients asking for server-sent events get framed chunks and a final [DONE]"""
+    mock_search_documents.return_value = MOCK_DOCUMENTS
+    mock_chunk = MagicMock()
+    mock_chunk.choices = [MagicMock(delta=MagicMock(content="streaming "))]
+    mock_generate_answer.return_value = iter([mock_chunk])
+    request = AskRequest(
+        messages=VALID_MESSAGES,
+        session_id="test-session",
+        model="gpt-4o",
+        options={"stream": True}
+    )
+
+    @app.route('/test-sse', methods=['POST'])
+    def test_sse():
+        return handle_ask_streaming(request, sse=True)
+
+    with app.test_client() as client:
+        response = client.post('/test-sse')
+
+        assert response.status_code == 200
+        assert response.data == b'data: streaming \n\ndata: [DONE]\n\n'
+
+def test_sse_event_splits_lines():
+    """Multi-line text becomes one event with a data field per line"""
+    assert sse_event("Hello") == "data: Hello\n\n"
+    assert sse_event("a\n\nb") == "data: a\ndata: \ndata: b\n\n"
@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from unittest.mock import MagicMock, patch
+from libs import query_cache
+
+MOCK_DOCUMENTS = [{"title": "Document 1", "content": "Content about life"}]
+
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    query_cache.clear()
+
+def test_cached_search_reuses_normalized_query():
+    """Queries differing only in case and whitespace share one retrieval"""
+    search = MagicMock(return_value=MOCK_DOCUMENTS)
+
+    assert query_cache.cached_search(search, "What is life?") == MOCK_DOCUMENTS
+    assert query_cache.cached_search(search, "  what is   LIFE? ") == MOCK_DOCUMENTS
+
+    search.assert_called_once_with("What is life?")
+
+def test_cached_search_after_clear():
+    """Clearing the cache forces a new retrieval"""
+    search = MagicMock(return_value=MOCK_DOCUMENTS)
+    query_cache.cached_search(search, "What is life?")
+
+    query_cache.clear()
+    query_cache.cached_search(search, "What is life?")
+
+    assert search.call_count == 2
+
+def test_cached_search_skips_put_after_concurrent_clear():
+    """A search that overlaps a clear() returns its result but does not cache it"""
+    def search_during_clear(query):
+        # The documents change while this search is running
+        query_cache.clear()
+        return MOCK_DOCUMENTS
+
+    search = MagicMock(side_effect=search_during_clear)
+
+    assert query_cache.cached_search(search, "What is life?") == MOCK_DOCUMENTS
+    assert query_cache.get("What is life?") is None
+
+def test_cached_search_expires():
+    """Entries older than the TTL are retrieved again"""
+    search = MagicMock(return_value=MOCK_DOCUMENTS)
+    with patch.object(query_cache, "QUERY_CACHE_TTL", 0):
+        query_cache.cached_search(search, "What is life?")
+        query_cache.cached_search(search, "What is life?")
+
+    assert search.call_count == 2
+
+def test_cached_search_coalesces_concurrent_misses():
+    """Identical queries arriving while a search runs share its result"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_search(query):
+        started.set()
+        release.wait(5)
+        return MOCK_DOCUMENTS
+
+    search = MagicMock(side_effect=slow_search)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(query_cache.cached_search, search, "What is life?")
+        started.wait(5)
+        # Expire entries immediately so followers can only be served by the in-flight search
+        with patch.object(query_cache, "QUERY_CACHE_TTL", 0):
+            followers = [pool.submit(query_cache.cached_search, search, "what is life?") for _ in range(3)]
+            time.sleep(0.05)
+            release.set()
+            results = [first.result()] + [f.result() for f in followers]
+
+    assert results == [MOCK_DOCUMENTS] * 4
+    search.assert_called_once()